@@ -0,0 +1,49 @@
+"""Add pg_trgm indexes for product substring search.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('barcode', 'seller_sku', 'brand')
+
+
+def upgrade() -> None:
+    # Trigram GIN indexes serve ILIKE '%...%' on each searchable column.
+    # They are built CONCURRENTLY, outside the migration transaction, so
+    # writes to products are not blocked while they build; IF NOT EXISTS
+    # lets an interrupted run be repeated.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for column in SEARCH_COLUMNS:
+            op.create_index(
+                f'ix_products_{column}_trgm',
+                'products',
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    # The extension is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        for column in reversed(SEARCH_COLUMNS):
+            op.drop_index(
+                f'ix_products_{column}_trgm',
+                table_name='products',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
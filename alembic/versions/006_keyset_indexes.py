@@ -0,0 +1,30 @@
+"""Add (created_at, id) indexes for keyset pagination.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pages seek on the (created_at, id) row value; the journal's
+    # single-column created_at index is covered by the new one
+    op.create_index('ix_stock_movements_created_at_id', 'stock_movements', ['created_at', 'id'])
+    op.drop_index('ix_stock_movements_created_at', table_name='stock_movements')
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_created_at_id', table_name='products')
+    op.create_index('ix_stock_movements_created_at', 'stock_movements', ['created_at'])
+    op.drop_index('ix_stock_movements_created_at_id', table_name='stock_movements')
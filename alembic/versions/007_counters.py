@@ -0,0 +1,128 @@
+"""Add trigger-maintained counters for list totals.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# counter name -> (table, predicate on transition table rows)
+COUNTERS = {
+    'products': ('products', 'NOT is_deleted'),
+    'stock_movements': ('stock_movements', 'true'),
+}
+
+
+def upgrade() -> None:
+    # A counter is the sum of its delta rows. Writers only insert deltas,
+    # so they never wait on each other for a counter row lock, not even
+    # writers that commit together (the partitioned import).
+    op.create_table(
+        'counters',
+        sa.Column('id', sa.BigInteger(), sa.Identity(always=True), primary_key=True),
+        sa.Column('name', sa.String(63), nullable=False),
+        sa.Column('delta', sa.BigInteger(), nullable=False),
+    )
+    op.create_index('ix_counters_name', 'counters', ['name'])
+
+    # Statement-level triggers: one counter write per statement, not per row
+    op.execute("""
+        CREATE FUNCTION counter_add(counter text, delta bigint) RETURNS void AS $$
+        BEGIN
+            IF delta <> 0 THEN
+                INSERT INTO counters (name, delta) VALUES (counter, delta);
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Folds the deltas of every counter into one row. Deltas of transactions
+    # still in flight are invisible to the DELETE and stay for the next run.
+    op.execute("""
+        CREATE FUNCTION compact_counters() RETURNS void AS $$
+            WITH folded AS (DELETE FROM counters RETURNING name, delta)
+            INSERT INTO counters (name, delta)
+            SELECT name, sum(delta) FROM folded GROUP BY name HAVING sum(delta) <> 0
+        $$ LANGUAGE sql
+    """)
+
+    for counter, (table, predicate) in COUNTERS.items():
+        op.execute(f"""
+            CREATE FUNCTION {counter}_count_insert() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}', (SELECT count(*) FROM new_rows WHERE {predicate}));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_count_update() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}',
+                    (SELECT count(*) FROM new_rows WHERE {predicate})
+                    - (SELECT count(*) FROM old_rows WHERE {predicate}));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_count_delete() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}', -(SELECT count(*) FROM old_rows WHERE {predicate}));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_count_truncate() RETURNS trigger AS $$
+            BEGIN
+                DELETE FROM counters WHERE name = '{counter}';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
+        # Block writers while the counter is seeded, so no row is missed
+        op.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+        op.execute(f"""
+            CREATE TRIGGER {counter}_count_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {counter}_count_insert()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {counter}_count_update AFTER UPDATE ON {table}
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {counter}_count_update()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {counter}_count_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION {counter}_count_delete()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {counter}_count_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION {counter}_count_truncate()
+        """)
+        op.execute(f"""
+            INSERT INTO counters (name, delta)
+            SELECT '{counter}', count(*) FROM {table} WHERE {predicate}
+        """)
+
+
+def downgrade() -> None:
+    for counter, (table, _) in reversed(COUNTERS.items()):
+        for event in ('truncate', 'delete', 'update', 'insert'):
+            op.execute(f'DROP TRIGGER {counter}_count_{event} ON {table}')
+            op.execute(f'DROP FUNCTION {counter}_count_{event}()')
+    op.execute('DROP FUNCTION compact_counters()')
+    op.execute('DROP FUNCTION counter_add(text, bigint)')
+    op.drop_table('counters')
@@ -0,0 +1,180 @@
+"""Partition stock_movements by month of created_at.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one during the migration; afterwards
+# the application keeps MOVEMENT_PARTITIONS_AHEAD months ready
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'id, operation_type, product_id, quantity, source_id, '
+    'distribution_center_id, user_id, notes, created_at, updated_at'
+)
+
+COUNTER_TRIGGERS = (
+    ('insert', 'AFTER INSERT', 'REFERENCING NEW TABLE AS new_rows'),
+    ('update', 'AFTER UPDATE', 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('delete', 'AFTER DELETE', 'REFERENCING OLD TABLE AS old_rows'),
+    ('truncate', 'AFTER TRUNCATE', ''),
+)
+
+
+def _movement_columns() -> list[sa.Column]:
+    # Constraint names are given explicitly: the table being replaced still
+    # holds the default names while its successor is created
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('operation_type', sa.String(50), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('products.id', ondelete='CASCADE', name='stock_movements_product_id_fkey'), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('source_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('sources.id', ondelete='SET NULL', name='stock_movements_source_id_fkey'), nullable=True),
+        sa.Column('distribution_center_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('distribution_centers.id', ondelete='SET NULL', name='stock_movements_distribution_center_id_fkey'), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE', name='stock_movements_user_id_fkey'), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def _create_counter_triggers() -> None:
+    # Statement-level triggers on the parent see the rows of every partition
+    for event, timing, referencing in COUNTER_TRIGGERS:
+        op.execute(f"""
+            CREATE TRIGGER stock_movements_count_{event} {timing} ON stock_movements
+            {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION stock_movements_count_{event}()
+        """)
+
+
+def _create_indexes() -> None:
+    # Indexes on the parent are created on every partition, including
+    # partitions attached later. Rows arrive in created_at order, so the
+    # time index only grows at its right edge and can be packed full.
+    op.create_index(
+        'ix_stock_movements_created_at_id', 'stock_movements', ['created_at', 'id'],
+        postgresql_with={'fillfactor': 100},
+    )
+    op.create_index('ix_stock_movements_product_id', 'stock_movements', ['product_id'])
+    op.create_index('ix_stock_movements_operation_type', 'stock_movements', ['operation_type'])
+    op.create_index('ix_stock_movements_user_id', 'stock_movements', ['user_id'])
+
+
+def upgrade() -> None:
+    op.execute('LOCK TABLE stock_movements IN EXCLUSIVE MODE')
+    op.rename_table('stock_movements', 'stock_movements_old')
+    op.execute('ALTER INDEX stock_movements_pkey RENAME TO stock_movements_old_pkey')
+    for name in ('created_at_id', 'product_id', 'operation_type', 'user_id'):
+        op.drop_index(f'ix_stock_movements_{name}', table_name='stock_movements_old')
+
+    # The partition key must be part of the primary key
+    op.create_table(
+        'stock_movements',
+        *_movement_columns(),
+        sa.PrimaryKeyConstraint('id', 'created_at', name='stock_movements_pkey'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    # Catches rows outside every monthly partition instead of failing the insert
+    op.execute('CREATE TABLE stock_movements_default PARTITION OF stock_movements DEFAULT')
+
+    op.execute("""
+        CREATE FUNCTION create_stock_movements_partition(month_of timestamptz) RETURNS void AS $$
+        DECLARE
+            month_start timestamp := date_trunc('month', month_of AT TIME ZONE 'UTC');
+            lower_bound timestamptz := month_start AT TIME ZONE 'UTC';
+            upper_bound timestamptz := (month_start + interval '1 month') AT TIME ZONE 'UTC';
+            partition_name text := 'stock_movements_' || to_char(month_start, 'YYYY_MM');
+        BEGIN
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                RETURN;
+            END IF;
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE stock_movements INCLUDING DEFAULTS)', partition_name
+            );
+            -- Rows of this month that went to the default partition move
+            -- over; writing to partitions directly leaves the counters alone
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM stock_movements_default '
+                'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                lower_bound, upper_bound, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE stock_movements ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, lower_bound, upper_bound
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION create_stock_movements_partitions(months_ahead integer) RETURNS void AS $$
+        BEGIN
+            -- One creator at a time across application processes
+            PERFORM pg_advisory_xact_lock(hashtext('create_stock_movements_partitions'));
+            FOR i IN 0..months_ahead LOOP
+                PERFORM create_stock_movements_partition(now() + make_interval(months => i));
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Partitions for the existing history, then the months ahead
+    op.execute("""
+        SELECT create_stock_movements_partition(month_start AT TIME ZONE 'UTC')
+        FROM generate_series(
+            date_trunc('month', (SELECT min(created_at) FROM stock_movements_old) AT TIME ZONE 'UTC'),
+            now() AT TIME ZONE 'UTC',
+            interval '1 month'
+        ) AS month_start
+    """)
+    op.execute(f'SELECT create_stock_movements_partitions({MONTHS_AHEAD})')
+
+    # Counter triggers are created after the copy: the counters already
+    # count these rows
+    op.execute(f"""
+        INSERT INTO stock_movements ({COLUMNS})
+        SELECT {COLUMNS} FROM stock_movements_old
+    """)
+    _create_indexes()
+    _create_counter_triggers()
+    op.drop_table('stock_movements_old')
+    op.execute('ANALYZE stock_movements')
+
+
+def downgrade() -> None:
+    op.execute('LOCK TABLE stock_movements IN EXCLUSIVE MODE')
+    op.create_table(
+        'stock_movements_new',
+        *_movement_columns(),
+        sa.PrimaryKeyConstraint('id', name='stock_movements_new_pkey'),
+    )
+    op.execute(f"""
+        INSERT INTO stock_movements_new ({COLUMNS})
+        SELECT {COLUMNS} FROM stock_movements
+    """)
+    # Dropping the parent drops all partitions and their indexes
+    op.drop_table('stock_movements')
+    op.execute('DROP FUNCTION create_stock_movements_partitions(integer)')
+    op.execute('DROP FUNCTION create_stock_movements_partition(timestamptz)')
+
+    op.rename_table('stock_movements_new', 'stock_movements')
+    op.execute('ALTER INDEX stock_movements_new_pkey RENAME TO stock_movements_pkey')
+    op.create_index('ix_stock_movements_created_at_id', 'stock_movements', ['created_at', 'id'])
+    op.create_index('ix_stock_movements_product_id', 'stock_movements', ['product_id'])
+    op.create_index('ix_stock_movements_operation_type', 'stock_movements', ['operation_type'])
+    op.create_index('ix_stock_movements_user_id', 'stock_movements', ['user_id'])
+    _create_counter_triggers()
@@ -0,0 +1,79 @@
+"""Add (column, created_at) indexes for journal filters.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Filter column -> partial index predicate. Every index ends with the
+# journal order (created_at DESC, id DESC), so a filtered page is read in
+# order straight from the index, keyset cursors included.
+FILTER_INDEXES = {
+    'product_id': None,
+    'operation_type': None,
+    'user_id': None,
+    'source_id': 'source_id IS NOT NULL',
+    'distribution_center_id': 'distribution_center_id IS NOT NULL',
+}
+
+# Single-column indexes made redundant by the composite ones
+REPLACED_INDEXES = ('product_id', 'operation_type', 'user_id')
+
+
+def _partitions() -> list[str]:
+    result = op.get_bind().execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits "
+        "WHERE inhparent = 'stock_movements'::regclass ORDER BY 1"
+    ))
+    return list(result.scalars())
+
+
+def upgrade() -> None:
+    # A partitioned index cannot be built CONCURRENTLY, so it is created on
+    # the parent only (invalid until complete), each partition's index is
+    # built without blocking journal writes, and then attached. Each step
+    # can be re-run if the migration is interrupted after the first commit.
+    partitions = _partitions()
+    for column, predicate in FILTER_INDEXES.items():
+        where = f' WHERE {predicate}' if predicate else ''
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_stock_movements_{column}_created_at ON ONLY stock_movements '
+            f'({column}, created_at DESC, id DESC){where}'
+        )
+
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            for column, predicate in FILTER_INDEXES.items():
+                where = f' WHERE {predicate}' if predicate else ''
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_{column}_created_at_idx '
+                    f'ON {partition} ({column}, created_at DESC, id DESC){where}'
+                )
+
+    for partition in partitions:
+        for column in FILTER_INDEXES:
+            op.execute(
+                f'ALTER INDEX ix_stock_movements_{column}_created_at '
+                f'ATTACH PARTITION {partition}_{column}_created_at_idx'
+            )
+
+    for column in REPLACED_INDEXES:
+        op.drop_index(f'ix_stock_movements_{column}', table_name='stock_movements')
+
+
+def downgrade() -> None:
+    for column in REPLACED_INDEXES:
+        op.create_index(f'ix_stock_movements_{column}', 'stock_movements', [column])
+    for column in reversed(FILTER_INDEXES):
+        op.drop_index(f'ix_stock_movements_{column}_created_at', table_name='stock_movements')
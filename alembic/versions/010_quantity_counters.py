@@ -0,0 +1,108 @@
+"""Add stock and defect quantity counters for the stock summary.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# counter name -> table whose quantity column it sums
+COUNTERS = {
+    'stock_quantity': 'stocks',
+    'defect_quantity': 'defect_stocks',
+}
+
+TRIGGERS = (
+    ('insert', 'AFTER INSERT', 'REFERENCING NEW TABLE AS new_rows'),
+    ('update', 'AFTER UPDATE', 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('delete', 'AFTER DELETE', 'REFERENCING OLD TABLE AS old_rows'),
+    ('truncate', 'AFTER TRUNCATE', ''),
+)
+
+
+def upgrade() -> None:
+    for counter, table in COUNTERS.items():
+        op.execute(f"""
+            CREATE FUNCTION {counter}_sum_insert() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}', (SELECT coalesce(sum(quantity), 0) FROM new_rows));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_sum_update() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}',
+                    (SELECT coalesce(sum(quantity), 0) FROM new_rows)
+                    - (SELECT coalesce(sum(quantity), 0) FROM old_rows));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_sum_delete() RETURNS trigger AS $$
+            BEGIN
+                PERFORM counter_add('{counter}', -(SELECT coalesce(sum(quantity), 0) FROM old_rows));
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE FUNCTION {counter}_sum_truncate() RETURNS trigger AS $$
+            BEGIN
+                DELETE FROM counters WHERE name = '{counter}';
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+
+        # Block writers while the counter is seeded, so no change is missed
+        op.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+        for event, timing, referencing in TRIGGERS:
+            op.execute(f"""
+                CREATE TRIGGER {counter}_sum_{event} {timing} ON {table}
+                {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {counter}_sum_{event}()
+            """)
+        op.execute(f"""
+            INSERT INTO counters (name, delta)
+            SELECT '{counter}', coalesce(sum(quantity), 0) FROM {table}
+        """)
+
+    # Recomputes every counter from its table. Writers of the counted tables
+    # wait for it; readers do not.
+    op.execute("""
+        CREATE FUNCTION reconcile_counters() RETURNS void AS $$
+        BEGIN
+            LOCK TABLE products, stock_movements, stocks, defect_stocks IN SHARE MODE;
+            DELETE FROM counters;
+            INSERT INTO counters (name, delta)
+            SELECT 'products', count(*) FROM products WHERE NOT is_deleted
+            UNION ALL
+            SELECT 'stock_movements', count(*) FROM stock_movements
+            UNION ALL
+            SELECT 'stock_quantity', coalesce(sum(quantity), 0) FROM stocks
+            UNION ALL
+            SELECT 'defect_quantity', coalesce(sum(quantity), 0) FROM defect_stocks;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP FUNCTION reconcile_counters()')
+    for counter, table in reversed(COUNTERS.items()):
+        for event, _, _ in reversed(TRIGGERS):
+            op.execute(f'DROP TRIGGER {counter}_sum_{event} ON {table}')
+            op.execute(f'DROP FUNCTION {counter}_sum_{event}()')
+        op.execute(f"DELETE FROM counters WHERE name = '{counter}'")
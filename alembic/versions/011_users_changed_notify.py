@@ -0,0 +1,38 @@
+"""Notify listeners when a user changes, for auth cache revocation.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Delivered on commit, so API processes evict the user's cached tokens
+    # as soon as a deactivation or password change is visible
+    op.execute("""
+        CREATE FUNCTION users_notify_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('users_changed', OLD.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER users_notify_changed AFTER UPDATE OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION users_notify_changed()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER users_notify_changed ON users')
+    op.execute('DROP FUNCTION users_notify_changed()')
@@ -0,0 +1,194 @@
+"""Merge stocks and defect_stocks into one product_balances table.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# counter name -> (product_balances column, table it used to sum)
+COUNTERS = {
+    'stock_quantity': ('good_qty', 'stocks'),
+    'defect_quantity': ('defect_qty', 'defect_stocks'),
+}
+
+TRIGGERS = (
+    ('insert', 'AFTER INSERT', 'REFERENCING NEW TABLE AS new_rows'),
+    ('update', 'AFTER UPDATE', 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('delete', 'AFTER DELETE', 'REFERENCING OLD TABLE AS old_rows'),
+    ('truncate', 'AFTER TRUNCATE', ''),
+)
+
+# Counter delta of each event, per summed column
+DELTAS = {
+    'insert': '(SELECT coalesce(sum({column}), 0) FROM new_rows)',
+    'update': '(SELECT coalesce(sum({column}), 0) FROM new_rows)'
+              ' - (SELECT coalesce(sum({column}), 0) FROM old_rows)',
+    'delete': '-(SELECT coalesce(sum({column}), 0) FROM old_rows)',
+}
+
+RECONCILE_SQL = """
+    CREATE OR REPLACE FUNCTION reconcile_counters() RETURNS void AS $$
+    BEGIN
+        LOCK TABLE {tables} IN SHARE MODE;
+        DELETE FROM counters;
+        INSERT INTO counters (name, delta)
+        SELECT 'products', count(*) FROM products WHERE NOT is_deleted
+        UNION ALL
+        SELECT 'stock_movements', count(*) FROM stock_movements
+        UNION ALL
+        SELECT 'stock_quantity', coalesce(sum({stock}), 0) FROM {stock_table}
+        UNION ALL
+        SELECT 'defect_quantity', coalesce(sum({defect}), 0) FROM {defect_table};
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def _create_balance_table(name: str) -> None:
+    # As created by migration 002
+    op.create_table(
+        name,
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('products.id', ondelete='CASCADE'), unique=True, nullable=False),
+        sa.Column('quantity', sa.Integer(), default=0, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    # Block balance writers for the whole switch
+    op.execute('LOCK TABLE products, stocks, defect_stocks IN SHARE ROW EXCLUSIVE MODE')
+
+    op.create_table(
+        'product_balances',
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('good_qty', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('defect_qty', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.CheckConstraint('good_qty >= 0', name='ck_product_balances_good_qty_non_negative'),
+        sa.CheckConstraint('defect_qty >= 0', name='ck_product_balances_defect_qty_non_negative'),
+    )
+
+    # Every product gets a row, including products missing either balance
+    op.execute("""
+        INSERT INTO product_balances (product_id, good_qty, defect_qty, created_at, updated_at)
+        SELECT p.id,
+               coalesce(s.quantity, 0),
+               coalesce(d.quantity, 0),
+               coalesce(least(s.created_at, d.created_at), p.created_at),
+               coalesce(greatest(s.updated_at, d.updated_at), p.updated_at)
+        FROM products p
+        LEFT JOIN stocks s ON s.product_id = p.id
+        LEFT JOIN defect_stocks d ON d.product_id = p.id
+    """)
+
+    # The quantity counters (migration 010) move to product_balances
+    for counter, (_, table) in COUNTERS.items():
+        for event, _, _ in reversed(TRIGGERS):
+            op.execute(f'DROP TRIGGER {counter}_sum_{event} ON {table}')
+            op.execute(f'DROP FUNCTION {counter}_sum_{event}()')
+    op.drop_table('defect_stocks')
+    op.drop_table('stocks')
+
+    for event, timing, referencing in TRIGGERS:
+        if event == 'truncate':
+            body = f"DELETE FROM counters WHERE name IN ({', '.join(repr(c) for c in COUNTERS)});"
+        else:
+            body = '\n'.join(
+                f"PERFORM counter_add('{counter}', {DELTAS[event].format(column=column)});"
+                for counter, (column, _) in COUNTERS.items()
+            )
+        op.execute(f"""
+            CREATE FUNCTION product_balances_sum_{event}() RETURNS trigger AS $$
+            BEGIN
+                {body}
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER product_balances_sum_{event} {timing} ON product_balances
+            {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION product_balances_sum_{event}()
+        """)
+    op.execute(f"DELETE FROM counters WHERE name IN ({', '.join(repr(c) for c in COUNTERS)})")
+    for counter, (column, _) in COUNTERS.items():
+        op.execute(f"""
+            INSERT INTO counters (name, delta)
+            SELECT '{counter}', coalesce(sum({column}), 0) FROM product_balances
+        """)
+
+    op.execute(RECONCILE_SQL.format(
+        tables='products, stock_movements, product_balances',
+        stock='good_qty', stock_table='product_balances',
+        defect='defect_qty', defect_table='product_balances',
+    ))
+
+    # Read compatibility for external readers of the old tables; id is now
+    # the product id
+    for counter, (column, table) in COUNTERS.items():
+        op.execute(f"""
+            CREATE VIEW {table} AS
+            SELECT product_id AS id, product_id, {column} AS quantity, created_at, updated_at
+            FROM product_balances
+        """)
+
+
+def downgrade() -> None:
+    op.execute('LOCK TABLE products, product_balances IN SHARE ROW EXCLUSIVE MODE')
+
+    for counter, (column, table) in COUNTERS.items():
+        op.execute(f'DROP VIEW {table}')
+        _create_balance_table(table)
+        op.execute(f"""
+            INSERT INTO {table} (id, product_id, quantity, created_at, updated_at)
+            SELECT gen_random_uuid(), product_id, {column}, created_at, updated_at
+            FROM product_balances
+        """)
+
+    for event, _, _ in reversed(TRIGGERS):
+        op.execute(f'DROP TRIGGER product_balances_sum_{event} ON product_balances')
+        op.execute(f'DROP FUNCTION product_balances_sum_{event}()')
+    op.drop_table('product_balances')
+
+    # Counter triggers of migration 010
+    for counter, (_, table) in COUNTERS.items():
+        for event, timing, referencing in TRIGGERS:
+            if event == 'truncate':
+                body = f"DELETE FROM counters WHERE name = '{counter}';"
+            else:
+                body = f"PERFORM counter_add('{counter}', {DELTAS[event].format(column='quantity')});"
+            op.execute(f"""
+                CREATE FUNCTION {counter}_sum_{event}() RETURNS trigger AS $$
+                BEGIN
+                    {body}
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            op.execute(f"""
+                CREATE TRIGGER {counter}_sum_{event} {timing} ON {table}
+                {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {counter}_sum_{event}()
+            """)
+
+    op.execute(RECONCILE_SQL.format(
+        tables='products, stock_movements, stocks, defect_stocks',
+        stock='quantity', stock_table='stocks',
+        defect='quantity', defect_table='defect_stocks',
+    ))
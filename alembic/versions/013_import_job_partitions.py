@@ -0,0 +1,35 @@
+"""Record committed partitions of import jobs, so failed commits resume.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partition count the job's rows were split with, and the partitions
+    # whose transactions have committed (each records itself before commit)
+    op.add_column('import_jobs', sa.Column('partitions', sa.Integer(), nullable=True))
+    op.add_column(
+        'import_jobs',
+        sa.Column('committed_partitions', postgresql.ARRAY(sa.Integer()), server_default='{}', nullable=False),
+    )
+    op.add_column('import_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'attempts')
+    op.drop_column('import_jobs', 'committed_partitions')
+    op.drop_column('import_jobs', 'partitions')
@@ -2,12 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.models.user import User
 from app.schemas.auth import LoginRequest, Token
 from app.schemas.user import UserResponse
 from app.services.auth import AuthService
 from app.core.security import create_access_token
 from app.api.deps import get_current_user
+from app.services.auth_cache import CurrentUser
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -47,7 +47,7 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)) -> User:
+async def get_me(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """
     Get current user endpoint.
     
@@ -1,10 +1,14 @@
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, async_session, replica_session
 from app.services.auth import AuthService
+from app.services.auth_cache import CurrentUser
+from app.services.replica import WRITE_LSN_COOKIE, mark_replica_down, parse_lsn, replica_usable
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
@@ -13,15 +17,49 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     """
     Dependency to get the current authenticated user.
     
     Extracts and validates the JWT token from the Authorization header,
-    then returns the corresponding user.
+    then returns the corresponding user. Verified tokens are cached briefly;
+    changes to the user evict them immediately.
     
     Raises:
         HTTPException: 401 if token is invalid or user not found
     """
     token = credentials.credentials
     return await AuthService.get_current_user(db, token)
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints.
+    
+    Yields a replica session while the replica is within its lag limit and
+    has replayed the client's last write (the write LSN cookie set after
+    every write); a primary session otherwise, including when the replica
+    cannot be connected to or its pool has no connection to spare.
+    """
+    write_lsn = parse_lsn(request.cookies.get(WRITE_LSN_COOKIE))
+    if replica_usable(write_lsn):
+        session = replica_session()
+        try:
+            # Connect now, while falling back is still possible
+            await session.connection()
+        except PoolTimeoutError:
+            # Replica pool exhausted: the replica itself is fine
+            await session.close()
+            session = async_session()
+        except (OSError, DBAPIError):
+            await session.close()
+            mark_replica_down()
+            session = async_session()
+    else:
+        session = async_session()
+    
+    async with session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -6,9 +6,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.distribution_center import DistributionCenter
-from app.models.user import User
+from app.models.loading import COLUMNS_ONLY
 from app.schemas.distribution_center import DCCreate, DCUpdate, DCResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_read_db
+from app.services.auth_cache import CurrentUser
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/distribution-centers", tags=["distribution-centers"])
 
@@ -16,25 +18,23 @@ router = APIRouter(prefix="/distribution-centers", tags=["distribution-centers"]
 @router.get("/", response_model=list[DCResponse])
 async def list_distribution_centers(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[DistributionCenter]:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> list[DCResponse]:
     """
     List all distribution centers.
     
     Returns all distribution centers in the system.
-    Requires authentication.
+    Requires authentication. Served from the per-process reference cache.
     """
-    result = await db.execute(
-        select(DistributionCenter).order_by(DistributionCenter.marketplace, DistributionCenter.code)
-    )
-    return list(result.scalars().all())
+    data = await reference_cache.get(db)
+    return data.distribution_centers
 
 
 @router.post("/", response_model=DCResponse, status_code=status.HTTP_201_CREATED)
 async def create_distribution_center(
     data: DCCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> DistributionCenter:
     """
     Create a new distribution center.
@@ -50,7 +50,7 @@ async def create_distribution_center(
     """
     # Check if DC with same code exists
     existing = await db.execute(
-        select(DistributionCenter).where(DistributionCenter.code == data.code)
+        select(DistributionCenter.id).where(DistributionCenter.code == data.code)
     )
     if existing.scalar_one_or_none():
         raise HTTPException(
@@ -61,6 +61,7 @@ async def create_distribution_center(
     dc = DistributionCenter(**data.model_dump())
     db.add(dc)
     await db.commit()
+    reference_cache.invalidate()
     await db.refresh(dc)
     return dc
 
@@ -68,8 +69,8 @@ async def create_distribution_center(
 @router.get("/{dc_id}", response_model=DCResponse)
 async def get_distribution_center(
     dc_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> DistributionCenter:
     """
     Get a distribution center by ID.
@@ -84,7 +85,7 @@ async def get_distribution_center(
         HTTPException: 404 if distribution center not found
     """
     result = await db.execute(
-        select(DistributionCenter).where(DistributionCenter.id == dc_id)
+        select(DistributionCenter).where(DistributionCenter.id == dc_id).options(*COLUMNS_ONLY)
     )
     dc = result.scalar_one_or_none()
     
@@ -102,7 +103,7 @@ async def update_distribution_center(
     dc_id: UUID,
     data: DCUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> DistributionCenter:
     """
     Update a distribution center.
@@ -118,7 +119,7 @@ async def update_distribution_center(
         HTTPException: 404 if distribution center not found
     """
     result = await db.execute(
-        select(DistributionCenter).where(DistributionCenter.id == dc_id)
+        select(DistributionCenter).where(DistributionCenter.id == dc_id).options(*COLUMNS_ONLY)
     )
     dc = result.scalar_one_or_none()
     
@@ -133,6 +134,7 @@ async def update_distribution_center(
         setattr(dc, key, value)
     
     await db.commit()
+    reference_cache.invalidate()
     await db.refresh(dc)
     return dc
 
@@ -141,7 +143,7 @@ async def update_distribution_center(
 async def delete_distribution_center(
     dc_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> None:
     """
     Delete a distribution center.
@@ -153,7 +155,7 @@ async def delete_distribution_center(
         HTTPException: 404 if distribution center not found
     """
     result = await db.execute(
-        select(DistributionCenter).where(DistributionCenter.id == dc_id)
+        select(DistributionCenter).where(DistributionCenter.id == dc_id).options(*COLUMNS_ONLY)
     )
     dc = result.scalar_one_or_none()
     
@@ -165,3 +167,4 @@ async def delete_distribution_center(
     
     await db.delete(dc)
     await db.commit()
+    reference_cache.invalidate()
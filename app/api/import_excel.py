@@ -1,32 +1,181 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+import shutil
+import tempfile
 import time
 
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
 from app.database import get_db
 from app.api.deps import get_current_user
-from app.models.user import User
+from app.services.auth_cache import CurrentUser
+from app.models.import_job import ImportJob
 from app.services.excel_import import ExcelImportService
-from app.schemas.import_schema import ExcelImportResponse, ExcelImportResult
+from app.services.import_jobs import ImportJobService
+from app.services.import_readers import SUPPORTED_EXTENSIONS
+from app.schemas.import_schema import (
+    ExcelImportPreviewResponse,
+    ExcelImportResponse,
+    ExcelImportResult,
+    ImportJobResponse,
+    ImportMode,
+)
 
 router = APIRouter(prefix="/import", tags=["import"])
 
+IMPORT_FILE_DESCRIPTION = (
+    "Excel file with 'Сводная' sheet, or CSV/Parquet export with the same columns"
+)
+
+
+def _spool_to_disk(file: UploadFile, directory: Optional[str] = None) -> Path:
+    """Copy the upload to a named temp file so it can be parsed by path."""
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    suffix = Path(file.filename or "").suffix
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=directory, delete=False) as spooled:
+        shutil.copyfileobj(file.file, spooled)
+    return Path(spooled.name)
+
+
+def _validate_filename(file: UploadFile) -> None:
+    if not file.filename or not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File must be one of: {', '.join(SUPPORTED_EXTENSIONS)}"
+        )
+
+
+def _job_response(job: ImportJob) -> ImportJobResponse:
+    response = ImportJobResponse.model_validate(job)
+    response.eta_seconds = ImportJobService.eta_seconds(job)
+    return response
+
+
 @router.post("/excel", response_model=ExcelImportResponse)
 async def import_excel(
-    file: UploadFile = File(..., description="Excel file with 'Сводная' sheet"),
+    file: UploadFile = File(..., description=IMPORT_FILE_DESCRIPTION),
+    mode: ImportMode = Query(
+        ImportMode.BATCH,
+        description="batch: multi-row upserts; copy: binary COPY into a staging table (large catalogs)",
+    ),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> ExcelImportResponse:
     """
-    Import products from Excel file.
+    Import products from an Excel (.xlsx), CSV or Parquet file.
+    
+    All formats share the 'Сводная' column names, validation and upsert
+    pipeline; CSV and Parquet skip openpyxl entirely.
+    
+    The upload is spooled to a temp file and parsed in a worker thread;
+    rows are written chunk by chunk as they are parsed.
+    
+    Compare `duration_seconds` and `result.batches` across modes to benchmark
+    the batch and copy paths on the same file.
     """
     start_time = time.time()
     
-    if not file.filename or not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="File must be Excel format (.xlsx or .xls)")
+    _validate_filename(file)
     
-    content = await file.read()
-    service = ExcelImportService(db)
-    result = await service.import_from_file(content)
+    path = await run_in_threadpool(_spool_to_disk, file)
+    try:
+        service = ExcelImportService(db)
+        result = await service.import_from_path(path, mode)
+    finally:
+        path.unlink(missing_ok=True)
     duration = time.time() - start_time
     
     return ExcelImportResponse(result=result, duration_seconds=round(duration, 2))
+
+
+@router.post("/preview", response_model=ExcelImportPreviewResponse)
+async def preview_import(
+    file: UploadFile = File(..., description=IMPORT_FILE_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> ExcelImportPreviewResponse:
+    """
+    Preview an Excel import without committing.
+    
+    Returns created/changed/unchanged counts and the list of new and changed
+    rows (with the fields that differ), capped at 1000 entries.
+    """
+    start_time = time.time()
+    
+    _validate_filename(file)
+    
+    path = await run_in_threadpool(_spool_to_disk, file)
+    try:
+        service = ExcelImportService(db, dry_run=True)
+        result = await service.import_from_path(path)
+    finally:
+        path.unlink(missing_ok=True)
+    duration = time.time() - start_time
+    
+    return ExcelImportPreviewResponse(
+        result=result,
+        changes=service.changes,
+        duration_seconds=round(duration, 2),
+    )
+
+
+@router.post("/jobs", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_import_job(
+    file: UploadFile = File(..., description=IMPORT_FILE_DESCRIPTION),
+    mode: ImportMode = Query(ImportMode.BATCH, description="Import mode, see /import/excel"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> ImportJobResponse:
+    """
+    Queue an Excel import for the background worker.
+    
+    Returns immediately with the job; poll GET /import/jobs/{job_id} for progress.
+    Jobs run one at a time across all API workers.
+    """
+    _validate_filename(file)
+    
+    path = await run_in_threadpool(_spool_to_disk, file, settings.IMPORT_UPLOAD_DIR)
+    try:
+        job = await ImportJobService.submit(
+            db=db,
+            file_path=path,
+            filename=file.filename,
+            mode=mode,
+            user_id=str(current_user.id),
+        )
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> ImportJobResponse:
+    """
+    Get background import progress.
+    
+    Reports rows parsed, rows upserted, errors so far and an ETA while
+    running, and the full import result once finished.
+    
+    Raises:
+        HTTPException: 404 if job not found
+    """
+    job = await ImportJobService.get(db, job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    return _job_response(job)
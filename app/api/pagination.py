@@ -0,0 +1,123 @@
+"""
+Keyset pagination on (created_at, id).
+
+Lists are ordered newest first by (created_at DESC, id DESC). A cursor is
+the key of a boundary row plus a direction, encoded as an opaque string:
+next_cursor points after the last row of a page, prev_cursor before the
+first. Rows inserted while a client is paging only ever appear before the
+first page, so pages never shift or repeat rows.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Decoded cursor: boundary row key and which side of it to read."""
+    created_at: datetime
+    id: UUID
+    before: bool = False
+
+
+def encode_cursor(row: Any, before: bool = False) -> str:
+    """Build an opaque cursor from a row with created_at and id."""
+    payload = json.dumps([row.created_at.isoformat(), str(row.id), int(before)])
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(value: str) -> Cursor:
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        created_at, row_id, before = json.loads(base64.urlsafe_b64decode(padded))
+        return Cursor(datetime.fromisoformat(created_at), UUID(row_id), bool(before))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_query(query: Select, model: Any, cursor: Cursor, page_size: int) -> Select:
+    """
+    Restrict query to the rows on the cursor's side of its key.
+
+    Fetches one extra row so keyset_page can tell whether more rows follow.
+    Rows before the key are read in ascending order and reversed later.
+    """
+    key = tuple_(model.created_at, model.id)
+    boundary = tuple_(cursor.created_at, cursor.id)
+    # The plain created_at bound is implied by the row comparison, but only
+    # it lets the planner prune partitions of a partitioned table
+    if cursor.before:
+        query = (
+            query
+            .where(model.created_at >= cursor.created_at, key > boundary)
+            .order_by(model.created_at.asc(), model.id.asc())
+        )
+    else:
+        query = (
+            query
+            .where(model.created_at <= cursor.created_at, key < boundary)
+            .order_by(model.created_at.desc(), model.id.desc())
+        )
+    return query.limit(page_size + 1)
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    cursor: Cursor,
+    page_size: int,
+) -> tuple[list[Any], Optional[str], Optional[str]]:
+    """
+    Trim rows fetched by keyset_query to a page, newest first.
+
+    Returns:
+        (rows, next_cursor, prev_cursor); a cursor is None at either end
+    """
+    has_more = len(rows) > page_size
+    rows = list(rows[:page_size])
+    if cursor.before:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    has_next = has_more if not cursor.before else True
+    has_prev = has_more if cursor.before else True
+    next_cursor = encode_cursor(rows[-1]) if has_next else None
+    prev_cursor = encode_cursor(rows[0], before=True) if has_prev else None
+    return rows, next_cursor, prev_cursor
+
+
+def offset_cursors(
+    rows: Sequence[Any],
+    offset: int,
+    page_size: int,
+    total: Optional[int],
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Cursors for a page read in offset mode, so clients can switch to keyset.
+
+    total is None when only an estimate is known; a full page is then
+    assumed to have a successor.
+    """
+    if not rows:
+        return None, None
+    has_next = offset + len(rows) < total if total is not None else len(rows) == page_size
+    next_cursor = encode_cursor(rows[-1]) if has_next else None
+    prev_cursor = encode_cursor(rows[0], before=True) if offset > 0 else None
+    return next_cursor, prev_cursor
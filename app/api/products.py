@@ -2,15 +2,13 @@ from uuid import UUID
 import math
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, or_, case
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.models.product import Product
-from app.models.stock import Stock
-from app.models.defect_stock import DefectStock
-from app.models.user import User
+from app.models.loading import COLUMNS_ONLY, PRODUCT_WITH_BALANCES
+from app.models.product_balance import ProductBalance
 from app.schemas.product import (
     ProductCreate,
     ProductUpdate,
@@ -18,58 +16,125 @@ from app.schemas.product import (
     ProductWithStockResponse,
     ProductListResponse,
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_read_db
+from app.services.auth_cache import CurrentUser
+from app.api.pagination import decode_cursor, keyset_query, keyset_page, offset_cursors
+from app.services.counts import CountMode, CountService
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Columns matched by the q search; each has a pg_trgm GIN index (migration 005)
+SEARCH_COLUMNS = (Product.barcode, Product.seller_sku, Product.brand)
+TRIGRAM_LENGTH = 3
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_filter(q: str):
+    """
+    Match q on any search column, served by the trigram indexes.
+
+    Queries shorter than a trigram match as a prefix: '%ab%' yields no
+    trigrams and would scan the whole index, 'ab%' does not.
+    """
+    escaped = _escape_like(q)
+    pattern = f"{escaped}%" if len(q) < TRIGRAM_LENGTH else f"%{escaped}%"
+    return or_(*(column.ilike(pattern, escape="\\") for column in SEARCH_COLUMNS))
+
+
+def _search_rank(q: str):
+    """Rank exact matches 0, prefix matches 1, other substring matches 2."""
+    escaped = _escape_like(q)
+    return case(
+        (or_(*(column.ilike(escaped, escape="\\") for column in SEARCH_COLUMNS)), 0),
+        (or_(*(column.ilike(f"{escaped}%", escape="\\") for column in SEARCH_COLUMNS)), 1),
+        else_=2,
+    )
+
 
 @router.get("/", response_model=ProductListResponse)
 async def list_products(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     barcode: str | None = Query(None, description="Search by barcode"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    q: str | None = Query(None, max_length=100, description="Search by barcode, seller SKU or brand"),
+    cursor: str | None = Query(None, description="next_cursor/prev_cursor of a previous page; replaces page"),
+    count: CountMode = Query(CountMode.AUTO, description="auto: estimate broad searches; exact: always count"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> ProductListResponse:
     """
-    List products with pagination and optional barcode search.
+    List products with pagination and optional search.
     
     - Excludes soft-deleted products
     - Includes stock_quantity and defect_quantity
+    - barcode: case-insensitive substring match on barcode
+    - q: substring match on barcode, seller_sku or brand; results are
+      ranked exact matches first, then prefix matches, newest first
+      within a rank; queries under 3 characters match as a prefix only
+    - cursor: keyset pagination on (created_at, id), not combinable with q
+    - total: exact for the unfiltered list (row counter) and narrow
+      searches; a planner estimate for broad searches unless count=exact,
+      see total_exact
+    
+    Returns 400 if cursor is malformed or combined with q.
     """
     # Base query - exclude deleted
     base_query = select(Product).where(Product.is_deleted == False)
     
     # Barcode search filter
     if barcode:
-        base_query = base_query.where(Product.barcode.ilike(f"%{barcode}%"))
+        base_query = base_query.where(Product.barcode.ilike(f"%{_escape_like(barcode)}%", escape="\\"))
     
-    # Count total
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    # Multi-column search
+    search = q.strip() if q else ""
+    if search:
+        base_query = base_query.where(_search_filter(search))
     
-    # Calculate pagination
-    offset = (page - 1) * page_size
-    pages = math.ceil(total / page_size) if total > 0 else 1
+    # Ranked search results have no stable (created_at, id) order to page by
+    if cursor and search:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor cannot be combined with q"
+        )
     
-    # Fetch products with stock data
-    query = (
-        base_query
-        .options(selectinload(Product.stock), selectinload(Product.defect_stock))
-        .order_by(Product.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
+    # Total: row counter, planner estimate or counted with the page
+    filtered = bool(barcode or search)
+    total = await CountService.total(
+        db, base_query, None if filtered else "products", count, window=not cursor
     )
     
-    result = await db.execute(query)
-    products = list(result.scalars().all())
+    # Fetch products with stock data
+    offset = (page - 1) * page_size
+    query = base_query.options(*PRODUCT_WITH_BALANCES)
+    if cursor:
+        position = decode_cursor(cursor)
+        result = await db.execute(keyset_query(query, Product, position, page_size))
+        products, next_cursor, prev_cursor = keyset_page(result.scalars().all(), position, page_size)
+    else:
+        ordering = [_search_rank(search)] if search else []
+        page_query = (
+            query
+            .order_by(*ordering, Product.created_at.desc(), Product.id.desc())
+            .offset(offset)
+            .limit(page_size)
+        )
+        products, total = await CountService.fetch_page(db, page_query, base_query, total)
+        next_cursor, prev_cursor = (
+            offset_cursors(products, offset, page_size, total.value if total.exact else None)
+            if not search else (None, None)
+        )
+    
+    pages = math.ceil(total.value / page_size) if total.value > 0 else 1
     
     # Build response with stock quantities
     items = []
     for product in products:
-        stock_qty = product.stock.quantity if product.stock else 0
-        defect_qty = product.defect_stock.quantity if product.defect_stock else 0
+        stock_qty = product.balance.good_qty if product.balance else 0
+        defect_qty = product.balance.defect_qty if product.balance else 0
         
         items.append(ProductWithStockResponse(
             id=product.id,
@@ -87,10 +152,13 @@ async def list_products(
     
     return ProductListResponse(
         items=items,
-        total=total,
+        total=total.value,
+        total_exact=total.exact,
         page=page,
         page_size=page_size,
         pages=pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
 
 
@@ -98,19 +166,18 @@ async def list_products(
 async def create_product(
     data: ProductCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Product:
     """
-    Create a new product with auto-created Stock and DefectStock records.
+    Create a new product with an auto-created balance record.
     
     - Validates barcode uniqueness
     - Validates GTIN uniqueness
-    - Creates Stock with quantity=0
-    - Creates DefectStock with quantity=0
+    - Creates ProductBalance with good_qty=0 and defect_qty=0
     """
     # Check barcode uniqueness
     existing_barcode = await db.execute(
-        select(Product).where(Product.barcode == data.barcode)
+        select(Product.id).where(Product.barcode == data.barcode)
     )
     if existing_barcode.scalar_one_or_none():
         raise HTTPException(
@@ -120,7 +187,7 @@ async def create_product(
     
     # Check GTIN uniqueness
     existing_gtin = await db.execute(
-        select(Product).where(Product.gtin == data.gtin)
+        select(Product.id).where(Product.gtin == data.gtin)
     )
     if existing_gtin.scalar_one_or_none():
         raise HTTPException(
@@ -140,13 +207,9 @@ async def create_product(
     db.add(product)
     await db.flush()  # Get the product ID
     
-    # Create Stock record
-    stock = Stock(product_id=product.id, quantity=0)
-    db.add(stock)
-    
-    # Create DefectStock record
-    defect_stock = DefectStock(product_id=product.id, quantity=0)
-    db.add(defect_stock)
+    # Create balance record
+    balance = ProductBalance(product_id=product.id, good_qty=0, defect_qty=0)
+    db.add(balance)
     
     await db.commit()
     await db.refresh(product)
@@ -157,8 +220,8 @@ async def create_product(
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Product:
     """
     Get a product by ID.
@@ -166,10 +229,9 @@ async def get_product(
     - Returns 404 if product not found or is deleted
     """
     result = await db.execute(
-        select(Product).where(
-            Product.id == product_id,
-            Product.is_deleted == False
-        )
+        select(Product)
+        .where(Product.id == product_id, Product.is_deleted == False)
+        .options(*COLUMNS_ONLY)
     )
     product = result.scalar_one_or_none()
     
@@ -187,7 +249,7 @@ async def update_product(
     product_id: UUID,
     data: ProductUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Product:
     """
     Update a product (partial update).
@@ -197,10 +259,9 @@ async def update_product(
     - Returns 404 if product not found or is deleted
     """
     result = await db.execute(
-        select(Product).where(
-            Product.id == product_id,
-            Product.is_deleted == False
-        )
+        select(Product)
+        .where(Product.id == product_id, Product.is_deleted == False)
+        .options(*COLUMNS_ONLY)
     )
     product = result.scalar_one_or_none()
     
@@ -215,7 +276,7 @@ async def update_product(
     # Check barcode uniqueness if being updated
     if "barcode" in update_data and update_data["barcode"] != product.barcode:
         existing = await db.execute(
-            select(Product).where(Product.barcode == update_data["barcode"])
+            select(Product.id).where(Product.barcode == update_data["barcode"])
         )
         if existing.scalar_one_or_none():
             raise HTTPException(
@@ -226,7 +287,7 @@ async def update_product(
     # Check GTIN uniqueness if being updated
     if "gtin" in update_data and update_data["gtin"] != product.gtin:
         existing = await db.execute(
-            select(Product).where(Product.gtin == update_data["gtin"])
+            select(Product.id).where(Product.gtin == update_data["gtin"])
         )
         if existing.scalar_one_or_none():
             raise HTTPException(
@@ -248,7 +309,7 @@ async def update_product(
 async def delete_product(
     product_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> None:
     """
     Soft delete a product.
@@ -257,10 +318,9 @@ async def delete_product(
     - Returns 404 if product not found or already deleted
     """
     result = await db.execute(
-        select(Product).where(
-            Product.id == product_id,
-            Product.is_deleted == False
-        )
+        select(Product)
+        .where(Product.id == product_id, Product.is_deleted == False)
+        .options(*COLUMNS_ONLY)
     )
     product = result.scalar_one_or_none()
     
@@ -6,9 +6,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.models.source import Source
-from app.models.user import User
+from app.models.loading import COLUMNS_ONLY
 from app.schemas.source import SourceCreate, SourceUpdate, SourceResponse
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_read_db
+from app.services.auth_cache import CurrentUser
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/sources", tags=["sources"])
 
@@ -16,23 +18,23 @@ router = APIRouter(prefix="/sources", tags=["sources"])
 @router.get("/", response_model=list[SourceResponse])
 async def list_sources(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[Source]:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> list[SourceResponse]:
     """
     List all sources.
     
     Returns all sources in the system.
-    Requires authentication.
+    Requires authentication. Served from the per-process reference cache.
     """
-    result = await db.execute(select(Source).order_by(Source.name))
-    return list(result.scalars().all())
+    data = await reference_cache.get(db)
+    return data.sources
 
 
 @router.post("/", response_model=SourceResponse, status_code=status.HTTP_201_CREATED)
 async def create_source(
     data: SourceCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Source:
     """
     Create a new source.
@@ -48,7 +50,7 @@ async def create_source(
     """
     # Check if source with same name exists
     existing = await db.execute(
-        select(Source).where(Source.name == data.name)
+        select(Source.id).where(Source.name == data.name)
     )
     if existing.scalar_one_or_none():
         raise HTTPException(
@@ -59,6 +61,7 @@ async def create_source(
     source = Source(**data.model_dump())
     db.add(source)
     await db.commit()
+    reference_cache.invalidate()
     await db.refresh(source)
     return source
 
@@ -66,8 +69,8 @@ async def create_source(
 @router.get("/{source_id}", response_model=SourceResponse)
 async def get_source(
     source_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Source:
     """
     Get a source by ID.
@@ -82,7 +85,7 @@ async def get_source(
         HTTPException: 404 if source not found
     """
     result = await db.execute(
-        select(Source).where(Source.id == source_id)
+        select(Source).where(Source.id == source_id).options(*COLUMNS_ONLY)
     )
     source = result.scalar_one_or_none()
     
@@ -100,7 +103,7 @@ async def update_source(
     source_id: UUID,
     data: SourceUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> Source:
     """
     Update a source.
@@ -116,7 +119,7 @@ async def update_source(
         HTTPException: 404 if source not found
     """
     result = await db.execute(
-        select(Source).where(Source.id == source_id)
+        select(Source).where(Source.id == source_id).options(*COLUMNS_ONLY)
     )
     source = result.scalar_one_or_none()
     
@@ -131,6 +134,7 @@ async def update_source(
         setattr(source, key, value)
     
     await db.commit()
+    reference_cache.invalidate()
     await db.refresh(source)
     return source
 
@@ -139,7 +143,7 @@ async def update_source(
 async def delete_source(
     source_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> None:
     """
     Delete a source.
@@ -151,7 +155,7 @@ async def delete_source(
         HTTPException: 404 if source not found
     """
     result = await db.execute(
-        select(Source).where(Source.id == source_id)
+        select(Source).where(Source.id == source_id).options(*COLUMNS_ONLY)
     )
     source = result.scalar_one_or_none()
     
@@ -163,3 +167,4 @@ async def delete_source(
     
     await db.delete(source)
     await db.commit()
+    reference_cache.invalidate()
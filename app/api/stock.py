@@ -3,24 +3,27 @@ from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func
+from sqlalchemy import select, false
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.models.user import User
 from app.models.stock_movement import StockMovement
 from app.models.product import Product
-from app.models.stock import Stock
-from app.models.defect_stock import DefectStock
+from app.models.loading import MOVEMENT_WITH_PRODUCT
 from app.schemas.movement import (
     MovementCreate,
+    MovementBulkCreate,
+    MovementBulkResponse,
     MovementResponse,
     MovementFilter,
     MovementListResponse,
 )
 from app.services.movement import MovementService
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_read_db
+from app.services.auth_cache import CurrentUser
+from app.api.pagination import decode_cursor, keyset_query, keyset_page, offset_cursors
+from app.services.counts import CountMode, CountService
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/stock", tags=["stock"])
 
@@ -29,17 +32,17 @@ router = APIRouter(prefix="/stock", tags=["stock"])
 async def create_movement(
     data: MovementCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> MovementResponse:
     """
     Execute a stock movement operation.
     
-    - Validates product exists
     - Validates conditional fields (source_id, distribution_center_id)
-    - Updates stock atomically
-    - Creates audit log entry
+    - Checks the product, updates stock and creates the audit log entry
+      with a single statement
     
-    Returns 400 if insufficient stock for the operation.
+    Returns 400 if insufficient stock for the operation, 404 if the product
+    is not found.
     """
     movement = await MovementService.execute_movement(
         db=db,
@@ -47,24 +50,37 @@ async def create_movement(
         user_id=str(current_user.id)
     )
     await db.commit()
-    await db.refresh(movement)
-    
-    # Load relationships for response
-    await db.refresh(movement, ["product"])
-    
-    return MovementResponse(
-        id=movement.id,
-        operation_type=movement.operation_type,
-        product_id=movement.product_id,
-        quantity=movement.quantity,
-        source_id=movement.source_id,
-        distribution_center_id=movement.distribution_center_id,
-        user_id=movement.user_id,
-        notes=movement.notes,
-        created_at=movement.created_at,
-        product_barcode=movement.product.barcode,
-        product_gtin=movement.product.gtin,
+    await MovementService.resolve_names(db, [movement])
+    
+    return movement
+
+
+@router.post("/movements/bulk", response_model=MovementBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_movements_bulk(
+    data: MovementBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+) -> MovementBulkResponse:
+    """
+    Execute many stock movement operations in one transaction.
+    
+    - Lines are applied in request order
+    - Balances are locked in deterministic order and updated set-based
+    - Journal rows are inserted with a single statement
+    - All-or-nothing: any failing line rolls back the whole request
+    
+    Returns 400 (insufficient stock) or 404 (product not found) with a list
+    of {"line", "detail"} entries for every failing line.
+    """
+    items = await MovementService.execute_bulk(
+        db=db,
+        items=data.items,
+        user_id=str(current_user.id)
     )
+    await db.commit()
+    await MovementService.resolve_names(db, items)
+    
+    return MovementBulkResponse(items=items, total=len(items))
 
 
 @router.get("/movements", response_model=MovementListResponse)
@@ -73,23 +89,35 @@ async def list_movements(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     operation_type: str | None = Query(None, description="Filter by operation type"),
     product_id: UUID | None = Query(None, description="Filter by product"),
+    barcode: str | None = Query(None, description="Filter by product barcode (exact)"),
+    source_id: UUID | None = Query(None, description="Filter by source"),
+    distribution_center_id: UUID | None = Query(None, description="Filter by distribution center"),
+    user_id: UUID | None = Query(None, description="Filter by user"),
     date_from: datetime | None = Query(None, description="Filter from date"),
     date_to: datetime | None = Query(None, description="Filter to date"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: str | None = Query(None, description="next_cursor/prev_cursor of a previous page; replaces page"),
+    count: CountMode = Query(CountMode.AUTO, description="auto: estimate broad filters; exact: always count"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> MovementListResponse:
     """
     List stock movement journal with filtering and pagination.
     
-    - Filter by operation_type, product_id, date range
-    - Sorted by created_at DESC (newest first)
+    - Filter by operation_type, product_id or barcode, source_id,
+      distribution_center_id, user_id, date range; every filter combined
+      with the created_at order is served by a (column, created_at) index
+    - Sorted by created_at DESC, id DESC (newest first)
     - Includes product barcode and GTIN for display
+    - cursor: keyset pagination on (created_at, id); deep pages cost the
+      same as the first one, unlike page
+    - total: exact for the unfiltered journal (row counter) and narrow
+      filters; a planner estimate for broad filters unless count=exact,
+      see total_exact
+    
+    Returns 400 if cursor is malformed.
     """
-    # Base query with product relationship
-    base_query = (
-        select(StockMovement)
-        .options(selectinload(StockMovement.product))
-    )
+    # Base query with the product fields shown in the journal
+    base_query = select(StockMovement).options(*MOVEMENT_WITH_PRODUCT)
     
     # Apply filters
     if operation_type:
@@ -98,33 +126,64 @@ async def list_movements(
     if product_id:
         base_query = base_query.where(StockMovement.product_id == product_id)
     
+    # Barcode is resolved to its product once, so the journal is filtered
+    # on the indexed product_id instead of joining products per row
+    if barcode:
+        barcode_product = await db.execute(
+            select(Product.id).where(Product.barcode == barcode.strip())
+        )
+        barcode_product_id = barcode_product.scalar_one_or_none()
+        base_query = base_query.where(
+            StockMovement.product_id == barcode_product_id
+            if barcode_product_id is not None else false()
+        )
+    
+    if source_id:
+        base_query = base_query.where(StockMovement.source_id == source_id)
+    
+    if distribution_center_id:
+        base_query = base_query.where(StockMovement.distribution_center_id == distribution_center_id)
+    
+    if user_id:
+        base_query = base_query.where(StockMovement.user_id == user_id)
+    
     if date_from:
         base_query = base_query.where(StockMovement.created_at >= date_from)
     
     if date_to:
         base_query = base_query.where(StockMovement.created_at <= date_to)
     
-    # Count total
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Calculate pagination
-    offset = (page - 1) * page_size
-    pages = math.ceil(total / page_size) if total > 0 else 1
-    
-    # Fetch movements with pagination
-    query = (
-        base_query
-        .order_by(StockMovement.created_at.desc())
-        .offset(offset)
-        .limit(page_size)
+    # Total: row counter, planner estimate or counted with the page
+    filtered = bool(
+        operation_type or product_id or barcode or source_id
+        or distribution_center_id or user_id or date_from or date_to
+    )
+    total = await CountService.total(
+        db, base_query, None if filtered else "stock_movements", count, window=not cursor
     )
     
-    result = await db.execute(query)
-    movements = list(result.scalars().all())
-    
-    # Build response items
+    # Fetch movements with pagination
+    offset = (page - 1) * page_size
+    if cursor:
+        position = decode_cursor(cursor)
+        result = await db.execute(keyset_query(base_query, StockMovement, position, page_size))
+        movements, next_cursor, prev_cursor = keyset_page(result.scalars().all(), position, page_size)
+    else:
+        page_query = (
+            base_query
+            .order_by(StockMovement.created_at.desc(), StockMovement.id.desc())
+            .offset(offset)
+            .limit(page_size)
+        )
+        movements, total = await CountService.fetch_page(db, page_query, base_query, total)
+        next_cursor, prev_cursor = offset_cursors(
+            movements, offset, page_size, total.value if total.exact else None
+        )
+    
+    pages = math.ceil(total.value / page_size) if total.value > 0 else 1
+    
+    # Build response items; source and DC names come from the cache
+    refs = await reference_cache.get(db)
     items = []
     for movement in movements:
         items.append(MovementResponse(
@@ -139,47 +198,43 @@ async def list_movements(
             created_at=movement.created_at,
             product_barcode=movement.product.barcode if movement.product else None,
             product_gtin=movement.product.gtin if movement.product else None,
+            source_name=refs.source_name(movement.source_id),
+            dc_name=refs.dc_name(movement.distribution_center_id),
         ))
     
     return MovementListResponse(
         items=items,
-        total=total,
+        total=total.value,
+        total_exact=total.exact,
         page=page,
         page_size=page_size,
         pages=pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
 
 
 @router.get("/summary")
 async def get_stock_summary(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ) -> dict:
     """
     Get stock summary statistics.
     
     Returns:
         - total_products: Count of non-deleted products
-        - total_stock: Sum of all Stock quantities
-        - total_defect: Sum of all DefectStock quantities
-    """
-    # Count non-deleted products
-    product_count = await db.execute(
-        select(func.count()).select_from(Product).where(Product.is_deleted == False)
-    )
-    total_products = product_count.scalar() or 0
-    
-    # Sum all stock quantities
-    stock_sum = await db.execute(
-        select(func.coalesce(func.sum(Stock.quantity), 0))
-    )
-    total_stock = stock_sum.scalar() or 0
+        - total_stock: Sum of all good quantities (product_balances.good_qty)
+        - total_defect: Sum of all defect quantities (product_balances.defect_qty)
     
-    # Sum all defect quantities
-    defect_sum = await db.execute(
-        select(func.coalesce(func.sum(DefectStock.quantity), 0))
+    All three are trigger-maintained counters, read in one query.
+    """
+    counters = await CountService.counters(
+        db, ["products", "stock_quantity", "defect_quantity"]
     )
-    total_defect = defect_sum.scalar() or 0
+    total_products = counters["products"]
+    total_stock = counters["stock_quantity"]
+    total_defect = counters["defect_quantity"]
     
     return {
         "total_products": total_products,
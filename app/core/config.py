@@ -8,6 +8,72 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     DEBUG: bool = False
 
+    # Connection pool per process. Size it to the requests a worker serves
+    # concurrently plus IMPORT_PARTITIONS connections for a running import.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Server settings sent at connect; statement_timeout 0 leaves it off
+    DB_JIT: bool = False
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # DATABASE_URL points at PgBouncer in transaction pooling mode: no
+    # statement caches, no startup settings. LISTEN needs a session, so
+    # DATABASE_LISTEN_URL should then point at PostgreSQL directly.
+    DB_PGBOUNCER: bool = False
+    DATABASE_LISTEN_URL: Optional[str] = None
+    # Streaming replica serving read-only endpoints; reads go to the primary
+    # while it lags more than REPLICA_MAX_LAG_SECONDS, is unreachable, or has
+    # not replayed the client's last write yet
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_SECONDS: float = 1.0
+    # Lifetime of the client's write watermark cookie
+    REPLICA_WRITE_COOKIE_SECONDS: int = 60
+
+    # bcrypt cost; stored hashes of another cost are replaced at login
+    BCRYPT_ROUNDS: int = 12
+    # Threads hashing passwords per process; logins beyond this wait
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # Verified tokens cached per process; user changes evict them at once
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # Background imports. Any API process may run a queued job, so with
+    # several hosts IMPORT_UPLOAD_DIR must be a directory they all share
+    # (e.g. a network volume mounted at the same path)
+    IMPORT_UPLOAD_DIR: str = "/tmp/wms-imports"
+    IMPORT_JOB_POLL_SECONDS: float = 2.0
+    # Running jobs refresh updated_at this often; a job not refreshed for
+    # IMPORT_JOB_STALE_SECONDS is failed by the check run every
+    # IMPORT_JOB_STALE_CHECK_SECONDS
+    IMPORT_JOB_HEARTBEAT_SECONDS: float = 30.0
+    IMPORT_JOB_STALE_SECONDS: int = 600
+    IMPORT_JOB_STALE_CHECK_SECONDS: float = 60.0
+    # A job whose partitions committed only in part is queued again, with the
+    # committed ones skipped, until it has been claimed this many times
+    IMPORT_JOB_MAX_ATTEMPTS: int = 3
+    # Connections an import writes on in parallel (rows split by GTIN hash)
+    IMPORT_PARTITIONS: int = 4
+
+    # List totals: filtered lists whose planner estimate is at least this
+    # many rows report the estimate instead of counting exactly
+    COUNT_ESTIMATE_MIN_ROWS: int = 10000
+    # Counters are kept as delta rows; this often they are folded into one
+    COUNTER_COMPACT_SECONDS: int = 60
+
+    # Sources and distribution centers are cached per process; writes in
+    # other processes become visible after at most this many seconds
+    REFERENCE_CACHE_TTL_SECONDS: int = 30
+
+    # Monthly stock_movements partitions kept ready beyond the current month
+    MOVEMENT_PARTITIONS_AHEAD: int = 3
+    MOVEMENT_PARTITIONS_CHECK_SECONDS: int = 6 * 3600
+
     class Config:
         env_file = ".env"
         extra = "ignore"
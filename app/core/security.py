@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -6,8 +8,25 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
-# Password hashing context
-PWD_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Hashes of any other cost need an update, so
+# changing BCRYPT_ROUNDS re-hashes each password at its next login.
+PWD_CONTEXT = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so hashing on threads keeps the event loop free.
+# The semaphore keeps waiting calls in the event loop rather than in the
+# executor queue: a login whose client went away is cancelled before it
+# costs a hash.
+_HASH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_HASH_SLOTS = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
 
 # JWT algorithm
 ALGORITHM = "HS256"
@@ -23,6 +42,30 @@ def get_password_hash(password: str) -> str:
     return PWD_CONTEXT.hash(password)
 
 
+async def _run_hashing(fn, *args):
+    async with _HASH_SLOTS:
+        return await asyncio.get_running_loop().run_in_executor(_HASH_EXECUTOR, fn, *args)
+
+
+async def verify_password_async(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop.
+    
+    Returns:
+        (valid, new_hash); new_hash is set when the stored hash was made
+        with another cost and should be replaced
+    """
+    return await _run_hashing(PWD_CONTEXT.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password off the event loop."""
+    return await _run_hashing(PWD_CONTEXT.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
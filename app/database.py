@@ -1,27 +1,186 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import asyncio
+import time
+from dataclasses import dataclass
 from typing import AsyncGenerator
+from uuid import uuid4
+
+from fastapi import Request
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
+
+@dataclass
+class PoolWaitStats:
+    """Cumulative connection checkout timings of one process."""
+    checkouts: int = 0
+    waited: int = 0          # checkouts that queued for a busy pool
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    connects: int = 0        # new server connections opened
+    connect_seconds: float = 0.0
+
+
+# Checkouts that queued less than this found a connection available
+WAIT_THRESHOLD_SECONDS = 0.001
+
+# Primary WAL position; replicas that replayed past it see every commit before it
+CURRENT_WAL_LSN_SQL = text("SELECT pg_current_wal_lsn()::text")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long checkouts wait for a connection.
+    
+    Time spent opening a new connection is reported separately from time
+    spent queueing behind other checkouts for a full pool.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        record = super()._create_connection()
+        elapsed = time.perf_counter() - started
+        self.wait_stats.connects += 1
+        self.wait_stats.connect_seconds += elapsed
+        record.info["connect_seconds"] = elapsed
+        return record
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            self._record_wait(time.perf_counter() - started)
+            raise
+        self._record_wait(
+            time.perf_counter() - started - record.info.pop("connect_seconds", 0.0)
+        )
+        return record
+
+    def _record_wait(self, waited: float) -> None:
+        stats = self.wait_stats
+        stats.checkouts += 1
+        if waited >= WAIT_THRESHOLD_SECONDS:
+            stats.waited += 1
+            stats.wait_seconds += waited
+            stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+
+
+def _connect_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # Transaction pooling hands each transaction to any server
+        # connection: no statement may stay prepared across transactions,
+        # and startup parameters are not forwarded, so jit and
+        # statement_timeout must be set on the database or role instead
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    server_settings = {"jit": "on" if settings.DB_JIT else "off"}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    return {
+        # SQLAlchemy prepares every statement on its first use on a
+        # connection and keeps it in its own per-connection cache; asyncpg's
+        # cache serves direct calls only
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": server_settings,
+    }
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+
+
+class PrimarySession(AsyncSession):
+    """
+    Session that can record the primary's WAL position after each commit.
+    
+    The position is read only when info["write_lsn_state"] is set (see
+    get_db) and stored as that object's write_lsn. Reading it begins a new
+    transaction, so the connection stays checked out until the session
+    closes or commits again.
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+        state = self.info.get("write_lsn_state")
+        if state is not None:
+            result = await self.execute(CURRENT_WAL_LSN_SQL)
+            state.write_lsn = result.scalar_one()
+
+
+def _session_factory(bind, class_: type[AsyncSession] = AsyncSession) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind,
+        class_=class_,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
-)
+engine = _create_engine(settings.DATABASE_URL)
 
 # Create async session factory
-async_session = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
+async_session = _session_factory(engine, PrimarySession)
+
+# Optional streaming replica for read-only endpoints (see api.deps.get_read_db)
+replica_engine = (
+    _create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
 )
+replica_session = _session_factory(replica_engine) if replica_engine is not None else None
+
+async def warm_pool() -> None:
+    """Open DB_POOL_SIZE connections, so the first requests do not pay for connecting."""
+    connections = await asyncio.gather(
+        *(engine.connect() for _ in range(settings.DB_POOL_SIZE))
+    )
+    for connection in connections:
+        await connection.close()
+
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting async database session."""
-    async with async_session() as session:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting async database session.
+    
+    With a replica configured, sessions of write requests record where the
+    primary's WAL stood after their last commit in request.state.write_lsn
+    (see main.write_lsn_cookie).
+    """
+    info = {}
+    if replica_engine is not None and request.method in WRITE_METHODS:
+        info["write_lsn_state"] = request.state
+    async with async_session(info=info) as session:
         try:
             yield session
         finally:
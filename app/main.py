@@ -1,9 +1,16 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
-from app.database import async_session
+from app.core.config import settings
+from app.database import async_session, engine, replica_engine, warm_pool
 from app.seed import seed_database
+from app.services.import_jobs import import_worker
+from app.services.maintenance import (
+    partition_maintainer, counter_compactor, replica_monitor, stale_import_reaper,
+)
+from app.services.replica import WRITE_LSN_COOKIE, replica_status
+from app.services.auth_cache import auth_cache_listener
 from app.api import auth, sources, distribution_centers, products, stock, import_excel
 
 
@@ -13,16 +20,34 @@ async def lifespan(app: FastAPI):
     Application lifespan context manager.
     
     Handles startup and shutdown events:
-    - Startup: Run database migrations and seed initial data
-    - Shutdown: Cleanup resources if needed
+    - Startup: Seed initial data, open the pool's connections, start the
+      background import worker and the stale import job reaper, the
+      stock_movements partition maintainer, the counter compactor, the auth cache listener and, with a replica
+      configured, the replica monitor
+    - Shutdown: Stop them
     """
     # Startup: seed database with initial data
     async with async_session() as db:
         await seed_database(db)
+    await warm_pool()
+    
+    import_worker.start()
+    stale_import_reaper.start()
+    partition_maintainer.start()
+    counter_compactor.start()
+    auth_cache_listener.start()
+    if replica_engine is not None:
+        replica_monitor.start()
     
     yield
     
-    # Shutdown: cleanup if needed (currently nothing to clean up)
+    # Shutdown: stop picking up import jobs
+    await import_worker.stop()
+    await stale_import_reaper.stop()
+    await partition_maintainer.stop()
+    await counter_compactor.stop()
+    await auth_cache_listener.stop()
+    await replica_monitor.stop()
 
 
 # Create FastAPI application
@@ -53,6 +78,28 @@ All endpoints require JWT authentication. Use `/api/auth/login` to get a token.
     redoc_url="/redoc",
 )
 
+@app.middleware("http")
+async def write_lsn_cookie(request: Request, call_next):
+    """
+    Remember where the primary's WAL stood after a client's write.
+    
+    get_db records the position after the write commits; get_read_db keeps
+    that client on the primary until the replica has replayed past it, so
+    clients always read their own writes.
+    """
+    response = await call_next(request)
+    write_lsn = getattr(request.state, "write_lsn", None)
+    if write_lsn is not None and response.status_code < 400:
+        response.set_cookie(
+            WRITE_LSN_COOKIE,
+            write_lsn,
+            max_age=settings.REPLICA_WRITE_COOKIE_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 # Register API routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(sources.router, prefix="/api")
@@ -71,3 +118,45 @@ async def health_check():
         dict: Status indicating the service is running
     """
     return {"status": "ok"}
+
+
+@app.get("/health/pool")
+async def pool_status():
+    """
+    Connection pool occupancy and checkout waits of this process.
+    
+    Returns:
+        dict: Live pool counters and cumulative wait statistics since start
+    """
+    pool = engine.pool
+    stats = pool.wait_stats
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "pgbouncer": settings.DB_PGBOUNCER,
+        "checkouts": stats.checkouts,
+        "waited": stats.waited,
+        "wait_seconds_total": round(stats.wait_seconds, 6),
+        "wait_seconds_max": round(stats.max_wait_seconds, 6),
+        "timeouts": stats.timeouts,
+        "connects": stats.connects,
+        "connect_seconds_total": round(stats.connect_seconds, 6),
+    }
+
+
+@app.get("/health/replica")
+async def replica_health():
+    """
+    Read replica state as last seen by this process's monitor.
+    
+    Returns:
+        dict: Whether reads are routed to the replica and its lag
+    """
+    return {
+        "configured": replica_engine is not None,
+        "available": replica_status.available,
+        "lag_seconds": replica_status.lag_seconds,
+    }
@@ -3,9 +3,10 @@ from app.models.user import User
 from app.models.source import Source
 from app.models.distribution_center import DistributionCenter
 from app.models.product import Product
-from app.models.stock import Stock
-from app.models.defect_stock import DefectStock
+from app.models.product_balance import ProductBalance
 from app.models.stock_movement import StockMovement, OperationType
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.models.counter import Counter
 
 __all__ = [
     "Base",
@@ -13,8 +14,10 @@ __all__ = [
     "Source",
     "DistributionCenter",
     "Product",
-    "Stock",
-    "DefectStock",
+    "ProductBalance",
     "StockMovement",
     "OperationType",
+    "ImportJob",
+    "ImportJobStatus",
+    "Counter",
 ]
@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Identity, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class Counter(Base):
+    """
+    One delta of a trigger-maintained counter (migration 007).
+    
+    The value of a counter is the sum of delta over its rows. Writers only
+    insert rows; compact_counters() periodically folds them into one.
+    """
+    
+    __tablename__ = "counters"
+    
+    id: Mapped[int] = mapped_column(BigInteger, Identity(always=True), primary_key=True)
+    name: Mapped[str] = mapped_column(String(63), nullable=False, index=True)
+    delta: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<Counter {self.name} {self.delta:+}>"
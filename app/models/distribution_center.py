@@ -27,11 +27,12 @@ class DistributionCenter(Base, UUIDMixin, TimestampMixin):
         nullable=False
     )
     
-    # Relationships
+    # Relationships: never loaded implicitly, see app/models/loading.py
     movements: Mapped[list["StockMovement"]] = relationship(
         "StockMovement",
         back_populates="distribution_center",
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
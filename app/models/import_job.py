@@ -0,0 +1,110 @@
+import enum
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, UUIDMixin, TimestampMixin
+
+
+class ImportJobStatus(str, enum.Enum):
+    """Enum for background import job states."""
+    PENDING = "pending"        # Ожидает в очереди
+    RUNNING = "running"        # Выполняется
+    COMPLETED = "completed"    # Успешно завершён
+    FAILED = "failed"          # Завершён с ошибками
+
+
+class ImportJob(Base, UUIDMixin, TimestampMixin):
+    """ImportJob model for Excel imports executed by the background worker."""
+    
+    __tablename__ = "import_jobs"
+    
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default=ImportJobStatus.PENDING.value,
+        nullable=False,
+        index=True
+    )
+    mode: Mapped[str] = mapped_column(
+        String(20),
+        nullable=False
+    )
+    filename: Mapped[str] = mapped_column(
+        String(255),
+        nullable=False
+    )
+    # Spooled upload in IMPORT_UPLOAD_DIR, removed once the job finishes
+    file_path: Mapped[str] = mapped_column(
+        Text,
+        nullable=False
+    )
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    
+    # Progress
+    rows_total: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True
+    )
+    rows_parsed: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False
+    )
+    # Rows created or updated so far; unchanged rows are not counted
+    rows_upserted: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False
+    )
+    error_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False
+    )
+    
+    # Resumption after a partial commit: rows are split into partitions
+    # partitions, and each partition records itself in
+    # committed_partitions within its own committing transaction
+    partitions: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True
+    )
+    committed_partitions: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer),
+        default=list,
+        nullable=False
+    )
+    # Times a worker claimed the job
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False
+    )
+    
+    # Final ExcelImportResult, or the failure reason
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(
+        JSONB,
+        nullable=True
+    )
+    message: Mapped[Optional[str]] = mapped_column(
+        Text,
+        nullable=True
+    )
+    
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ImportJob {self.id} {self.status}>"
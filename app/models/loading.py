@@ -0,0 +1,28 @@
+"""
+Relationship-loading profiles.
+
+Every relationship is declared lazy="raise": touching one a query did not
+load raises instead of quietly issuing a query (and, for the movements
+collections, loading a whole journal). Queries pick a profile from here
+with .options(*PROFILE).
+"""
+from sqlalchemy.orm import raiseload, selectinload
+
+from app.models.product import Product
+from app.models.product_balance import ProductBalance
+from app.models.stock_movement import StockMovement
+
+# Entity columns only; for handlers that read or update the row itself
+COLUMNS_ONLY = (raiseload("*"),)
+
+# Products with their balances, by primary key after the page is chosen;
+# joining them in would make broad searches sort wider rows
+PRODUCT_WITH_BALANCES = (
+    selectinload(Product.balance).load_only(ProductBalance.good_qty, ProductBalance.defect_qty),
+)
+
+# Journal rows with the product fields shown next to them. A second query
+# by primary key keeps the journal's keyset plans free of joins.
+MOVEMENT_WITH_PRODUCT = (
+    selectinload(StockMovement.product).load_only(Product.barcode, Product.gtin),
+)
@@ -5,8 +5,7 @@ from typing import Optional, TYPE_CHECKING
 from app.models.base import Base, UUIDMixin, TimestampMixin
 
 if TYPE_CHECKING:
-    from app.models.stock import Stock
-    from app.models.defect_stock import DefectStock
+    from app.models.product_balance import ProductBalance
     from app.models.stock_movement import StockMovement
 
 
@@ -14,6 +13,14 @@ class Product(Base, UUIDMixin, TimestampMixin):
     """Product model for inventory management."""
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Trigram indexes for substring search (pg_trgm, migration 005)
+        Index("ix_products_barcode_trgm", "barcode", postgresql_using="gin", postgresql_ops={"barcode": "gin_trgm_ops"}),
+        Index("ix_products_seller_sku_trgm", "seller_sku", postgresql_using="gin", postgresql_ops={"seller_sku": "gin_trgm_ops"}),
+        Index("ix_products_brand_trgm", "brand", postgresql_using="gin", postgresql_ops={"brand": "gin_trgm_ops"}),
+        # Keyset pagination (migration 006)
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
     
     # Core identifiers
     barcode: Mapped[str] = mapped_column(
@@ -55,23 +62,19 @@ class Product(Base, UUIDMixin, TimestampMixin):
         index=True
     )
     
-    # Relationships
-    stock: Mapped["Stock"] = relationship(
-        "Stock",
-        back_populates="product",
-        uselist=False,
-        lazy="selectin"
-    )
-    defect_stock: Mapped["DefectStock"] = relationship(
-        "DefectStock",
+    # Relationships: never loaded implicitly, see app/models/loading.py
+    balance: Mapped["ProductBalance"] = relationship(
+        "ProductBalance",
         back_populates="product",
         uselist=False,
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
     movements: Mapped[list["StockMovement"]] = relationship(
         "StockMovement",
         back_populates="product",
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
@@ -0,0 +1,60 @@
+from sqlalchemy import BigInteger, CheckConstraint, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import TYPE_CHECKING
+
+from app.models.base import Base, TimestampMixin
+
+if TYPE_CHECKING:
+    from app.models.product import Product
+
+
+class ProductBalance(Base, TimestampMixin):
+    """
+    Good and defect quantities of one product (migration 012).
+    
+    Writers bump version on every change. The stocks and defect_stocks
+    views expose the two columns in the shape of the former tables.
+    """
+    
+    __tablename__ = "product_balances"
+    __table_args__ = (
+        CheckConstraint("good_qty >= 0", name="ck_product_balances_good_qty_non_negative"),
+        CheckConstraint("defect_qty >= 0", name="ck_product_balances_defect_qty_non_negative"),
+    )
+    
+    # One row per product
+    product_id: Mapped[str] = mapped_column(
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    
+    # Quantity of good items
+    good_qty: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False
+    )
+    # Quantity of defective/damaged items
+    defect_qty: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False
+    )
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        default=1,
+        server_default="1",
+        nullable=False
+    )
+    
+    # Relationship back to product
+    product: Mapped["Product"] = relationship(
+        "Product",
+        back_populates="balance",
+        lazy="raise"
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ProductBalance product_id={self.product_id} good={self.good_qty} defect={self.defect_qty}>"
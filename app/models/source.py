@@ -23,11 +23,12 @@ class Source(Base, UUIDMixin, TimestampMixin):
         nullable=True
     )
     
-    # Relationships
+    # Relationships: never loaded implicitly, see app/models/loading.py
     movements: Mapped[list["StockMovement"]] = relationship(
         "StockMovement",
         back_populates="source",
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy import String, Text, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional, TYPE_CHECKING
 
@@ -29,12 +29,30 @@ class StockMovement(Base, UUIDMixin, TimestampMixin):
     """StockMovement model for recording all stock operations."""
     
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Keyset pagination (migration 006)
+        Index("ix_stock_movements_created_at_id", "created_at", "id", postgresql_with={"fillfactor": 100}),
+        # Journal filters in journal order (migration 009)
+        Index("ix_stock_movements_product_id_created_at", "product_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_stock_movements_operation_type_created_at", "operation_type", text("created_at DESC"), text("id DESC")),
+        Index("ix_stock_movements_user_id_created_at", "user_id", text("created_at DESC"), text("id DESC")),
+        Index(
+            "ix_stock_movements_source_id_created_at", "source_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("source_id IS NOT NULL"),
+        ),
+        Index(
+            "ix_stock_movements_distribution_center_id_created_at", "distribution_center_id", text("created_at DESC"), text("id DESC"),
+            postgresql_where=text("distribution_center_id IS NOT NULL"),
+        ),
+        # Monthly partitions (migration 008); the database primary key is
+        # (id, created_at), the mapper keeps identifying rows by id
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     
     # Operation details
     operation_type: Mapped[str] = mapped_column(
         String(50),
-        nullable=False,
-        index=True
+        nullable=False
     )
     quantity: Mapped[int] = mapped_column(
         nullable=False
@@ -43,8 +61,7 @@ class StockMovement(Base, UUIDMixin, TimestampMixin):
     # Foreign keys
     product_id: Mapped[str] = mapped_column(
         ForeignKey("products.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True
+        nullable=False
     )
     source_id: Mapped[Optional[str]] = mapped_column(
         ForeignKey("sources.id", ondelete="SET NULL"),
@@ -56,8 +73,7 @@ class StockMovement(Base, UUIDMixin, TimestampMixin):
     )
     user_id: Mapped[str] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True
+        nullable=False
     )
     
     # Optional notes
@@ -66,26 +82,26 @@ class StockMovement(Base, UUIDMixin, TimestampMixin):
         nullable=True
     )
     
-    # Relationships
+    # Relationships: never loaded implicitly, see app/models/loading.py
     product: Mapped["Product"] = relationship(
         "Product",
         back_populates="movements",
-        lazy="selectin"
+        lazy="raise"
     )
     source: Mapped[Optional["Source"]] = relationship(
         "Source",
         back_populates="movements",
-        lazy="selectin"
+        lazy="raise"
     )
     distribution_center: Mapped[Optional["DistributionCenter"]] = relationship(
         "DistributionCenter",
         back_populates="movements",
-        lazy="selectin"
+        lazy="raise"
     )
     user: Mapped["User"] = relationship(
         "User",
         back_populates="movements",
-        lazy="selectin"
+        lazy="raise"
     )
     
     def __repr__(self) -> str:
@@ -29,11 +29,12 @@ class User(Base, UUIDMixin, TimestampMixin):
         nullable=False
     )
     
-    # Relationships
+    # Relationships: never loaded implicitly, see app/models/loading.py
     movements: Mapped[list["StockMovement"]] = relationship(
         "StockMovement",
         back_populates="user",
-        lazy="selectin"
+        lazy="raise",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
@@ -0,0 +1,26 @@
+"""
+Recompute the trigger-maintained counters from their tables.
+
+Usage: python -m app.reconcile_counters
+
+Counters stay exact on their own; run this after bulk work that bypassed
+triggers (session_replication_role = replica, disabled triggers) or to
+check for drift. Writers of products, stock_movements and
+product_balances wait while it runs.
+"""
+import asyncio
+
+from app.database import async_session
+from app.services.counts import CountService
+
+
+async def main() -> None:
+    async with async_session() as db:
+        counters = await CountService.reconcile(db)
+    for name, (before, after) in counters.items():
+        drift = f"  (was {before})" if before != after else ""
+        print(f"{name}: {after}{drift}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,25 +1,15 @@
+import enum
+from datetime import datetime
 from typing import Optional
+from uuid import UUID
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel
 
 
-class ExcelImportRow(BaseModel):
-    """Schema representing one row from Excel import."""
-
-    barcode: str
-    seller_sku: Optional[str] = None
-    size: Optional[str] = None
-    brand: Optional[str] = None
-    stock_quantity: int = 0
-    defect_quantity: int = 0
-    row_number: int
-
-    @field_validator("barcode", "seller_sku", "size", "brand", mode="before")
-    @classmethod
-    def strip_strings(cls, v):
-        if isinstance(v, str):
-            return v.strip()
-        return v
+class ImportMode(str, enum.Enum):
+    """How parsed rows are written to the database."""
+    BATCH = "batch"  # multi-row INSERT ... ON CONFLICT per batch
+    COPY = "copy"    # binary COPY into a staging table, then set-based merge
 
 
 class ExcelImportError(BaseModel):
@@ -30,14 +20,40 @@ class ExcelImportError(BaseModel):
     message: str
 
 
+class ExcelImportBatchStats(BaseModel):
+    """Schema representing throughput of one upserted batch."""
+
+    batch_number: int
+    partition: int = 0
+    rows: int
+    created: int
+    updated: int
+    unchanged: int = 0
+    duration_seconds: float
+    rows_per_second: float
+
+
+class ExcelImportChange(BaseModel):
+    """Schema representing one new or changed row found by the differential import."""
+
+    row_number: int
+    barcode: str
+    action: str  # "created" or "changed"
+    fields: list[str] = []  # changed fields, empty for created rows
+
+
 class ExcelImportResult(BaseModel):
     """Schema representing import summary."""
 
     total_rows: int
     created: int
-    updated: int
+    updated: int  # existing products whose data changed
+    unchanged: int = 0
     errors: list[ExcelImportError]
     success: bool
+    mode: ImportMode = ImportMode.BATCH
+    partitions: int = 1
+    batches: list[ExcelImportBatchStats] = []
 
 
 class ExcelImportResponse(BaseModel):
@@ -45,3 +61,33 @@ class ExcelImportResponse(BaseModel):
 
     result: ExcelImportResult
     duration_seconds: float
+
+
+class ExcelImportPreviewResponse(BaseModel):
+    """Schema for import preview (diff without committing)."""
+
+    result: ExcelImportResult
+    changes: list[ExcelImportChange]
+    duration_seconds: float
+
+
+class ImportJobResponse(BaseModel):
+    """Schema for background import job status."""
+
+    id: UUID
+    status: str
+    mode: ImportMode
+    filename: str
+    rows_total: Optional[int] = None
+    rows_parsed: int
+    rows_upserted: int
+    error_count: int
+    eta_seconds: Optional[float] = None
+    result: Optional[ExcelImportResult] = None
+    message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -2,7 +2,7 @@ from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing_extensions import Self
 
 
@@ -64,11 +64,24 @@ class MovementResponse(MovementBase):
     created_at: datetime
     product_barcode: Optional[str] = None
     product_gtin: Optional[str] = None
+    source_name: Optional[str] = None
+    dc_name: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
+class MovementBulkCreate(BaseModel):
+    """Schema for executing many stock movements in one transaction."""
+    items: list[MovementCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class MovementBulkResponse(BaseModel):
+    """Schema for bulk movement response (one item per input line, same order)."""
+    items: list[MovementResponse]
+    total: int
+
+
 class MovementFilter(BaseModel):
     """Schema for filtering movement journal."""
     operation_type: Optional[str] = None
@@ -81,9 +94,12 @@ class MovementListResponse(BaseModel):
     """Schema for paginated movement list response."""
     items: list[MovementResponse]
     total: int
+    total_exact: bool = True  # False: total is a planner estimate
     page: int
     page_size: int
     pages: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
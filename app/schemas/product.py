@@ -53,9 +53,12 @@ class ProductListResponse(BaseModel):
     """Schema for paginated product list response."""
     items: list[ProductWithStockResponse]
     total: int
+    total_exact: bool = True  # False: total is a planner estimate
     page: int
     page_size: int
     pages: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.source import Source
 from app.models.distribution_center import DistributionCenter
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 # Seed data for sources (suppliers and pickup points)
 SOURCES = [
@@ -52,7 +52,7 @@ async def seed_database(db: AsyncSession) -> None:
     if not result.scalar_one_or_none():
         admin = User(
             email=ADMIN_USER["email"],
-            hashed_password=get_password_hash(ADMIN_USER["password"]),
+            hashed_password=await get_password_hash_async(ADMIN_USER["password"]),
             is_active=True,
         )
         db.add(admin)
@@ -1,11 +1,19 @@
 from typing import Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
-from app.core.security import verify_password, decode_token
+from app.models.loading import COLUMNS_ONLY
+from app.core.security import verify_password_async, decode_token
+from app.services.auth_cache import CurrentUser, auth_cache
+
+# Checked on every request whose token is not cached yet
+_CURRENT_USER_BY_EMAIL = (
+    select(User.id, User.email, User.is_active, User.created_at)
+    .where(User.email == bindparam("email"))
+)
 
 
 class AuthService:
@@ -30,7 +38,7 @@ class AuthService:
         """
         # Find user by email
         result = await db.execute(
-            select(User).where(User.email == email)
+            select(User).where(User.email == email).options(*COLUMNS_ONLY)
         )
         user = result.scalar_one_or_none()
         
@@ -40,27 +48,44 @@ class AuthService:
         if not user.is_active:
             return None
         
-        # Verify password
-        if not verify_password(password, user.hashed_password):
+        # Return the connection to the pool while waiting for a hashing
+        # thread; a burst of logins must not exhaust it
+        await db.commit()
+        
+        # Verify password on the hashing threads
+        valid, new_hash = await verify_password_async(password, user.hashed_password)
+        if not valid:
             return None
         
+        # Stored with another cost than BCRYPT_ROUNDS: re-hash transparently
+        if new_hash is not None:
+            user.hashed_password = new_hash
+            await db.commit()
+        
         return user
     
     @staticmethod
-    async def get_current_user(db: AsyncSession, token: str) -> User:
+    async def get_current_user(db: AsyncSession, token: str) -> CurrentUser:
         """
         Get the current user from a JWT token.
         
+        Verified tokens are served from the auth cache; otherwise the token
+        is decoded and the user loaded by columns, without relationships.
+        
         Args:
             db: Async database session
             token: JWT token string
             
         Returns:
-            User if token is valid
+            CurrentUser if token is valid
             
         Raises:
             HTTPException: 401 if token is invalid or user not found
         """
+        user = auth_cache.get(token)
+        if user is not None:
+            return user
+        
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -77,15 +102,17 @@ class AuthService:
             raise credentials_exception
         
         # Find user by email
-        result = await db.execute(
-            select(User).where(User.email == email)
-        )
-        user = result.scalar_one_or_none()
+        generation = auth_cache.generation
+        connection = await db.connection()
+        result = await connection.execute(_CURRENT_USER_BY_EMAIL, {"email": email})
+        row = result.one_or_none()
         
-        if user is None:
+        if row is None:
             raise credentials_exception
         
-        if not user.is_active:
+        if not row.is_active:
             raise credentials_exception
         
+        user = CurrentUser(**row._mapping)
+        auth_cache.put(token, user, payload["exp"], generation)
         return user
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Channel notified by the users trigger (migration 011)
+USERS_CHANNEL = "users_changed"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Authenticated user as seen by request handlers; no relationships."""
+    id: UUID
+    email: str
+    is_active: bool
+    created_at: datetime
+
+
+class AuthCache:
+    """
+    Per-process cache of verified tokens and their users.
+
+    An entry lives AUTH_CACHE_TTL_SECONDS at most and never past the token's
+    own expiry. Changes to a user (deactivation, password or email change,
+    deletion) evict that user's entries as soon as the notification arrives.
+    The cache is only used while the notification listener is connected, so
+    a missed notification cannot keep a revoked user authenticated.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[CurrentUser, float]] = {}
+        self._generation = 0
+        self.enabled = False
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every eviction; read before loading a user."""
+        return self._generation
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        user, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[token]
+            return None
+        return user
+
+    def put(self, token: str, user: CurrentUser, token_exp: float, generation: int) -> None:
+        """
+        Cache a user loaded while the cache was at generation.
+
+        Skipped if an eviction happened meanwhile: the user may have been
+        loaded just before the change that evicted it.
+        """
+        if not self.enabled or generation != self._generation:
+            return
+        ttl = min(settings.AUTH_CACHE_TTL_SECONDS, token_exp - time.time())
+        if ttl <= 0:
+            return
+        if len(self._entries) >= settings.AUTH_CACHE_MAX_ENTRIES:
+            # Entries are in insertion order; drop the oldest
+            del self._entries[next(iter(self._entries))]
+        self._entries[token] = (user, time.monotonic() + ttl)
+
+    def evict_user(self, user_id: str) -> None:
+        self._generation += 1
+        for token, (user, _) in list(self._entries.items()):
+            if str(user.id) == user_id:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+
+class AuthCacheListener:
+    """
+    Background task listening for user changes on a dedicated connection.
+
+    The cache is enabled only while listening. When the connection drops,
+    the cache is cleared and disabled until the listener reconnects.
+    """
+
+    RECONNECT_SECONDS = 5
+    PING_SECONDS = 10
+
+    def __init__(self, cache: AuthCache) -> None:
+        self._cache = cache
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        url = make_url(settings.DATABASE_LISTEN_URL) if settings.DATABASE_LISTEN_URL else engine.url
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                await self._listen(dsn)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Auth cache listener failed")
+            await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    async def _listen(self, dsn: str) -> None:
+        connection = await asyncpg.connect(dsn)
+        closed = asyncio.get_running_loop().create_future()
+
+        def on_notify(conn, pid, channel, payload: str) -> None:
+            self._cache.evict_user(payload)
+
+        def on_close(conn) -> None:
+            if not closed.done():
+                closed.set_result(None)
+
+        connection.add_termination_listener(on_close)
+        try:
+            await connection.add_listener(USERS_CHANNEL, on_notify)
+            # Changes made before LISTEN took effect were not seen
+            self._cache.clear()
+            self._cache.enabled = True
+            while not closed.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(closed), self.PING_SECONDS)
+                except asyncio.TimeoutError:
+                    # A silently dropped connection never reports closing
+                    await connection.fetchval("SELECT 1", timeout=self.PING_SECONDS)
+            logger.warning("Auth cache listener connection closed")
+        finally:
+            self._cache.enabled = False
+            self._cache.clear()
+            if not connection.is_closed():
+                await connection.close()
+
+
+auth_cache = AuthCache()
+auth_cache_listener = AuthCacheListener(auth_cache)
@@ -0,0 +1,181 @@
+import enum
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.models.counter import Counter
+
+# Trigger-maintained counters (migrations 007, 010, 012)
+COUNTERS = (
+    "products",         # non-deleted products
+    "stock_movements",  # journal rows
+    "stock_quantity",   # sum of product_balances.good_qty
+    "defect_quantity",  # sum of product_balances.defect_qty
+)
+
+
+class CountMode(str, enum.Enum):
+    """How a paginated list computes its total."""
+    AUTO = "auto"    # counter if unfiltered, estimate if broad, else exact
+    EXACT = "exact"  # always exact
+
+
+@dataclass
+class ListTotal:
+    """Total of a list; value None means count it along with the page."""
+    value: Optional[int]
+    exact: bool
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bound parameters."""
+    inherit_cache = False
+
+    def __init__(self, statement: Select) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class CountService:
+    """
+    Totals for paginated lists.
+
+    Strategies, cheapest first:
+    - unfiltered lists read the trigger-maintained counter (exact)
+    - filtered lists the planner expects to be large report its estimate
+    - the rest count exactly with count(*) OVER () in the page query
+    """
+
+    @staticmethod
+    async def total(
+        db: AsyncSession,
+        query: Select,
+        counter: Optional[str],
+        mode: CountMode,
+        window: bool = True
+    ) -> ListTotal:
+        """
+        Decide the total of query before the page is fetched.
+
+        Args:
+            db: Database session
+            query: Filtered list query, without ordering or paging
+            counter: Counter name if query is the unfiltered list
+            mode: Requested count mode
+            window: Whether the page query can carry count(*) OVER ();
+                keyset pages cannot, their WHERE clause skips rows
+
+        Returns:
+            ListTotal; value is None when the count is left to fetch_page
+        """
+        if counter is not None:
+            return ListTotal(await CountService.counter(db, counter), True)
+
+        if mode == CountMode.AUTO:
+            estimate = await CountService.estimate(db, query)
+            if estimate >= settings.COUNT_ESTIMATE_MIN_ROWS:
+                return ListTotal(estimate, False)
+
+        if window:
+            return ListTotal(None, True)
+        return ListTotal(await CountService.exact(db, query), True)
+
+    @staticmethod
+    async def fetch_page(
+        db: AsyncSession,
+        page_query: Select,
+        query: Select,
+        total: ListTotal
+    ) -> tuple[list[Any], ListTotal]:
+        """
+        Execute a page query, counting in the same statement if total is open.
+
+        Args:
+            db: Database session
+            page_query: Ordered, limited query of one entity
+            query: The same query without paging, for pages past the end
+            total: Result of total()
+
+        Returns:
+            (entities of the page, resolved total)
+        """
+        if total.value is not None:
+            result = await db.execute(page_query)
+            return list(result.scalars().all()), total
+
+        result = await db.execute(page_query.add_columns(func.count().over()))
+        rows = result.all()
+        if rows:
+            return [row[0] for row in rows], ListTotal(rows[0][1], True)
+        # A page past the last row has no row to carry the window count
+        return [], ListTotal(await CountService.exact(db, query), True)
+
+    @staticmethod
+    async def counter(db: AsyncSession, name: str) -> int:
+        """Value of one counter: the sum of its deltas; unknown names are 0."""
+        result = await db.execute(
+            select(func.coalesce(func.sum(Counter.delta), 0))
+            .where(Counter.name == name)
+        )
+        return int(result.scalar_one())
+
+    @staticmethod
+    async def counters(db: AsyncSession, names: list[str]) -> dict[str, int]:
+        """Values of several counters in one read; unknown names are 0."""
+        result = await db.execute(
+            select(Counter.name, func.sum(Counter.delta))
+            .where(Counter.name.in_(names))
+            .group_by(Counter.name)
+        )
+        values = {name: int(value) for name, value in result.all()}
+        return {name: values.get(name, 0) for name in names}
+
+    @staticmethod
+    async def reconcile(db: AsyncSession) -> dict[str, tuple[int, int]]:
+        """
+        Recompute every counter from its table.
+
+        Writers of the counted tables wait until the transaction commits.
+        Counters only drift if their triggers were bypassed, e.g. with
+        session_replication_role = replica or disabled triggers.
+
+        Returns:
+            Counter values before and after, as {name: (before, after)}
+        """
+        names = list(COUNTERS)
+        before = await CountService.counters(db, names)
+        await db.execute(text("SELECT reconcile_counters()"))
+        after = await CountService.counters(db, names)
+        await db.commit()
+        return {name: (before[name], after[name]) for name in names}
+
+    @staticmethod
+    async def compact(db: AsyncSession) -> None:
+        """Fold counter deltas, keeping counter reads to a row or a few."""
+        await db.execute(text("SELECT compact_counters()"))
+        await db.commit()
+
+    @staticmethod
+    async def estimate(db: AsyncSession, query: Select) -> int:
+        """Planner row estimate of query, from EXPLAIN without running it."""
+        result = await db.execute(_Explain(query))
+        plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    async def exact(db: AsyncSession, query: Select) -> int:
+        """Exact row count of query, with count(*) over it as a subquery."""
+        result = await db.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar() or 0
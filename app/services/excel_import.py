@@ -1,19 +1,157 @@
-from io import BytesIO
-from typing import Optional
+from contextlib import AsyncExitStack, aclosing
+from dataclasses import dataclass
+from itertools import chain
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
+from uuid import UUID, uuid4
+import asyncio
 import importlib
+import time
 
-from openpyxl import load_workbook
-from sqlalchemy import select
+from sqlalchemy import Row, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.database import async_session
 from app.models.product import Product
-from app.models.stock import Stock
-from app.models.defect_stock import DefectStock
+from app.models.product_balance import ProductBalance
+from app.services.import_readers import ParsedChunk, ParseProcess
+from app.services.import_rows import ImportRowBatch, generate_gtin
 
 _schemas = importlib.import_module("app.schemas.import_schema")
-ExcelImportRow = _schemas.ExcelImportRow
 ExcelImportError = _schemas.ExcelImportError
 ExcelImportResult = _schemas.ExcelImportResult
+ExcelImportBatchStats = _schemas.ExcelImportBatchStats
+ExcelImportChange = _schemas.ExcelImportChange
+ImportMode = _schemas.ImportMode
+
+T = TypeVar("T")
+
+# Transaction-level advisory lock serializing imports across all workers
+IMPORT_LOCK_KEY = 0x574D5349
+ACQUIRE_IMPORT_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:key)")
+
+STAGING_TABLE = "import_staging"
+STAGING_COLUMNS = (
+    "row_number",
+    "product_id",
+    "barcode",
+    "gtin",
+    "seller_sku",
+    "size",
+    "brand",
+    "stock_quantity",
+    "defect_quantity",
+)
+
+CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        row_number integer NOT NULL,
+        product_id uuid NOT NULL,
+        barcode text NOT NULL,
+        gtin text NOT NULL,
+        seller_sku text,
+        size text,
+        brand text,
+        stock_quantity integer NOT NULL,
+        defect_quantity integer NOT NULL
+    ) ON COMMIT DROP
+""")
+
+# Same checks as ImportRowBatch.validate, expressed over the staging table
+VALIDATE_STAGING_SQL = text(f"""
+    SELECT row_number, field, message FROM (
+        SELECT row_number, 'barcode' AS field,
+               'Duplicate barcode, first occurrence at row ' || first_row AS message
+        FROM (
+            SELECT row_number, min(row_number) OVER (PARTITION BY barcode) AS first_row
+            FROM {STAGING_TABLE}
+        ) occurrences
+        WHERE row_number > first_row
+        UNION ALL
+        SELECT row_number, 'barcode',
+               'GTIN ' || gtin || ' is also generated for barcode ' || first_barcode
+               || ' at row ' || first_row
+        FROM (
+            SELECT row_number, barcode, gtin,
+                   first_value(barcode) OVER w AS first_barcode,
+                   first_value(row_number) OVER w AS first_row
+            FROM {STAGING_TABLE}
+            WINDOW w AS (PARTITION BY gtin ORDER BY row_number)
+        ) generated
+        WHERE barcode <> first_barcode
+        UNION ALL
+        SELECT row_number, 'stock_quantity', 'Stock quantity cannot be negative'
+        FROM {STAGING_TABLE} WHERE stock_quantity < 0
+        UNION ALL
+        SELECT row_number, 'defect_quantity', 'Defect quantity cannot be negative'
+        FROM {STAGING_TABLE} WHERE defect_quantity < 0
+    ) errors
+    ORDER BY row_number
+""")
+
+# Compares staged rows with current state before the merge
+DIFF_STAGING_SQL = text(f"""
+    SELECT count(*) FILTER (WHERE p.id IS NULL) AS created,
+           count(*) FILTER (
+               WHERE p.id IS NOT NULL
+               AND (p.seller_sku, p.size, p.brand, p.is_deleted, b.good_qty, b.defect_qty)
+                   IS DISTINCT FROM
+                   (s.seller_sku, s.size, s.brand, false, s.stock_quantity, s.defect_quantity)
+           ) AS updated
+    FROM {STAGING_TABLE} s
+    LEFT JOIN products p ON p.barcode = s.barcode
+    LEFT JOIN product_balances b ON b.product_id = p.id
+""")
+
+# The WHERE clauses on DO UPDATE skip rows whose data did not change, so
+# unchanged rows produce no new tuple versions and keep their updated_at
+MERGE_PRODUCTS_SQL = text(f"""
+    INSERT INTO products (id, barcode, gtin, seller_sku, size, brand, is_deleted)
+    SELECT product_id, barcode, gtin, seller_sku, size, brand, false
+    FROM {STAGING_TABLE}
+    ON CONFLICT (barcode) DO UPDATE SET
+        seller_sku = EXCLUDED.seller_sku,
+        size = EXCLUDED.size,
+        brand = EXCLUDED.brand,
+        is_deleted = false,
+        updated_at = now()
+    WHERE (products.seller_sku, products.size, products.brand, products.is_deleted)
+        IS DISTINCT FROM (EXCLUDED.seller_sku, EXCLUDED.size, EXCLUDED.brand, false)
+""")
+
+MERGE_BALANCES_SQL = text(f"""
+    INSERT INTO product_balances (product_id, good_qty, defect_qty)
+    SELECT p.id, s.stock_quantity, s.defect_quantity
+    FROM {STAGING_TABLE} s
+    JOIN products p ON p.barcode = s.barcode
+    ON CONFLICT (product_id) DO UPDATE SET
+        good_qty = EXCLUDED.good_qty,
+        defect_qty = EXCLUDED.defect_qty,
+        version = product_balances.version + 1,
+        updated_at = now()
+    WHERE (product_balances.good_qty, product_balances.defect_qty)
+        IS DISTINCT FROM (EXCLUDED.good_qty, EXCLUDED.defect_qty)
+""")
+
+# Run by each partition of a background job right before its commit, so the
+# record commits if and only if the partition's rows do
+RECORD_PARTITION_SQL = text("""
+    UPDATE import_jobs
+    SET committed_partitions = array_append(committed_partitions, :partition),
+        partitions = :partitions
+    WHERE id = :job_id
+""")
+
+
+@dataclass
+class ImportProgress:
+    rows_total: Optional[int] = None  # estimate reported by the file reader
+    rows_parsed: int = 0
+    rows_upserted: int = 0  # rows created or updated; unchanged rows are not written
+    error_count: int = 0
 
 
 class ExcelImportService:
@@ -25,244 +163,469 @@ class ExcelImportService:
         "АКТУАЛЬНЫЙ ОСТАТОК": "stock_quantity",
         "БРАКИ": "defect_quantity",
     }
-    BATCH_SIZE = 500
-
-    def __init__(self, db: AsyncSession):
+    # 7 bind parameters per product row, asyncpg allows 32767 per statement
+    BATCH_SIZE = 2000
+    # Parsing stops once this many errors are collected
+    MAX_ERRORS = 1000
+    # Preview lists at most this many changed rows
+    MAX_PREVIEW_CHANGES = 1000
+    # Fields compared by the differential import
+    DIFF_FIELDS = ("seller_sku", "size", "brand", "is_deleted", "stock_quantity", "defect_quantity")
+    # Partition batches queued ahead of each partition writer
+    PARTITION_QUEUE_SIZE = 2
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        on_progress: Optional[Callable[[ImportProgress], Awaitable[None]]] = None,
+        dry_run: bool = False,
+        partitions: Optional[int] = None,
+        job_id: Optional[UUID] = None,
+        committed_partitions: Iterable[int] = (),
+    ):
         self.db = db
-
-    @staticmethod
-    def _generate_gtin(barcode: str) -> str:
-        if len(barcode) in (13, 14) and barcode.isdigit():
-            return barcode.zfill(14)
-        padded = barcode[:11].ljust(11, "0")
-        return f"IMP{padded}"
-
-    async def parse_excel(
-        self, file_content: bytes
-    ) -> tuple[list[ExcelImportRow], list[ExcelImportError]]:
-        rows: list[ExcelImportRow] = []
-        errors: list[ExcelImportError] = []
-        
+        self.on_progress = on_progress
+        self.progress = ImportProgress()
+        # dry_run computes the diff without writing (import preview)
+        self.dry_run = dry_run
+        self.changes: list[ExcelImportChange] = []
+        # Number of connections rows are written on (see import_from_path)
+        self.partitions = max(partitions or settings.IMPORT_PARTITIONS, 1)
+        # Background job whose committed partitions are recorded, and the
+        # partitions an earlier attempt of it has committed already
+        self.job_id = job_id
+        self.committed_partitions = set(committed_partitions)
+
+    async def stream_chunks(
+        self, path: Path, partitions: int, validate: bool
+    ) -> AsyncIterator[ParsedChunk]:
+        # The reader matching the file suffix runs in a child process (see
+        # ParseProcess), which also validates (batch mode) and partitions
+        # each chunk of at most BATCH_SIZE rows while the caller writes the
+        # previous ones. Only the waits for the queue run in a thread.
+        parser = ParseProcess(path, self.COLUMN_MAPPING, self.BATCH_SIZE, partitions, validate)
+        parser.start()
         try:
-            workbook = load_workbook(BytesIO(file_content), read_only=True, data_only=True)
-        except Exception as e:
-            errors.append(ExcelImportError(
-                row_number=0,
-                field="file",
-                message=f"Failed to open Excel file: {str(e)}"
-            ))
-            return rows, errors
-
-        sheet = None
-        for ws in workbook.worksheets:
-            if ws.title == "Сводная":
-                sheet = ws
-                break
-        
-        if sheet is None:
-            errors.append(ExcelImportError(
-                row_number=0,
-                field="sheet",
-                message="Sheet 'Сводная' not found"
-            ))
-            workbook.close()
-            return rows, errors
-
-        header_row = next(sheet.iter_rows(min_row=1, max_row=1), None)
-        if header_row is None:
-            errors.append(ExcelImportError(
-                row_number=1,
-                field="header",
-                message="Empty file - no header row"
-            ))
-            workbook.close()
-            return rows, errors
-
-        column_indices: dict[str, int] = {}
-        for idx, cell in enumerate(header_row):
-            header_value = str(cell.value).strip() if cell.value else ""
-            if header_value in self.COLUMN_MAPPING:
-                field_name = self.COLUMN_MAPPING[header_value]
-                column_indices[field_name] = idx
-
-        if "barcode" not in column_indices:
-            errors.append(ExcelImportError(
-                row_number=1,
-                field="barcode",
-                message="Required column 'Баркод' not found"
+            while (chunk := await asyncio.to_thread(parser.next_chunk)) is not None:
+                self.progress.rows_total = chunk.rows_total
+                yield chunk
+        finally:
+            await asyncio.to_thread(parser.stop)
+
+    async def _load_current_state(self, barcodes: list[str]) -> dict[str, Row]:
+        result = await self.db.execute(
+            select(
+                Product.id,
+                Product.barcode,
+                Product.seller_sku,
+                Product.size,
+                Product.brand,
+                Product.is_deleted,
+                ProductBalance.good_qty.label("stock_quantity"),
+                ProductBalance.defect_qty.label("defect_quantity"),
+            )
+            .outerjoin(ProductBalance, ProductBalance.product_id == Product.id)
+            .where(Product.barcode.in_(barcodes))
+        )
+        return {state.barcode: state for state in result}
+
+    def _changed_fields(self, batch: ImportRowBatch, i: int, state: Row) -> list[str]:
+        incoming = {
+            "seller_sku": batch.seller_sku[i],
+            "size": batch.size[i],
+            "brand": batch.brand[i],
+            "is_deleted": False,
+            "stock_quantity": batch.stock_quantity[i],
+            "defect_quantity": batch.defect_quantity[i],
+        }
+        return [field for field in self.DIFF_FIELDS if getattr(state, field) != incoming[field]]
+
+    def _record_change(self, batch: ImportRowBatch, i: int, action: str, fields: list[str]) -> None:
+        if self.dry_run and len(self.changes) < self.MAX_PREVIEW_CHANGES:
+            self.changes.append(ExcelImportChange(
+                row_number=batch.row_number[i],
+                barcode=batch.barcode[i],
+                action=action,
+                fields=fields,
             ))
-            workbook.close()
-            return rows, errors
 
-        for row_num, row in enumerate(sheet.iter_rows(min_row=2), start=2):
-            if all(cell.value is None for cell in row):
+    async def _upsert_products(self, batch: ImportRowBatch, indices: list[int]) -> dict[str, UUID]:
+        # Ids are generated client-side; for an existing barcode RETURNING
+        # reports the id of the row already stored. Rows are passed as
+        # executemany parameters: SQLAlchemy's insertmanyvalues batches them
+        # into multi-row statements from one cached compilation, where
+        # .values(list) would compile a fresh statement per batch.
+        rows = [
+            {
+                "id": uuid4(),
+                "barcode": batch.barcode[i],
+                "gtin": generate_gtin(batch.barcode[i]),
+                "seller_sku": batch.seller_sku[i],
+                "size": batch.size[i],
+                "brand": batch.brand[i],
+                "is_deleted": False,
+            }
+            for i in indices
+        ]
+        stmt = insert(Product.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.barcode],
+            set_={
+                "seller_sku": stmt.excluded.seller_sku,
+                "size": stmt.excluded.size,
+                "brand": stmt.excluded.brand,
+                "is_deleted": False,
+                "updated_at": func.now(),
+            },
+        ).returning(Product.id, Product.barcode)
+        result = await self.db.execute(stmt, rows)
+        return {product.barcode: product.id for product in result}
+
+    async def _upsert_balances(
+        self, batch: ImportRowBatch, indices: list[int], product_ids: dict[str, UUID]
+    ) -> None:
+        # Both quantities are written together, one row per product
+        rows = [
+            {
+                "product_id": product_ids[batch.barcode[i]],
+                "good_qty": batch.stock_quantity[i],
+                "defect_qty": batch.defect_quantity[i],
+            }
+            for i in indices
+        ]
+        stmt = insert(ProductBalance.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductBalance.product_id],
+            set_={
+                "good_qty": stmt.excluded.good_qty,
+                "defect_qty": stmt.excluded.defect_qty,
+                "version": ProductBalance.version + 1,
+                "updated_at": func.now(),
+            },
+        )
+        await self.db.execute(stmt, rows)
+
+    async def import_batch(self, batch: ImportRowBatch) -> tuple[int, int, int]:
+        # Differential upsert: the current state of the batch's barcodes is
+        # read with one SELECT and only new or changed rows are written, with
+        # one multi-row upsert per table. Barcodes must be unique within the
+        # batch (see ImportRowBatch.validate). Returns (created, updated, unchanged).
+        current = await self._load_current_state(batch.barcode)
+
+        product_rows: list[int] = []
+        balance_rows: list[int] = []
+        product_ids: dict[str, UUID] = {}
+        created = updated = 0
+
+        for i, barcode in enumerate(batch.barcode):
+            state = current.get(barcode)
+            if state is None:
+                product_rows.append(i)
+                balance_rows.append(i)
+                self._record_change(batch, i, "created", [])
+                created += 1
                 continue
 
-            def get_cell_value(field: str) -> Optional[str]:
-                if field not in column_indices:
-                    return None
-                idx = column_indices[field]
-                if idx >= len(row):
-                    return None
-                val = row[idx].value
-                return str(val).strip() if val is not None else None
-
-            def get_int_value(field: str) -> int:
-                if field not in column_indices:
-                    return 0
-                idx = column_indices[field]
-                if idx >= len(row):
-                    return 0
-                val = row[idx].value
-                if val is None:
-                    return 0
-                try:
-                    return int(float(val))
-                except (ValueError, TypeError):
-                    return 0
-
-            barcode = get_cell_value("barcode")
-            if not barcode:
-                errors.append(ExcelImportError(
-                    row_number=row_num,
-                    field="barcode",
-                    message="Barcode is required"
-                ))
+            product_ids[barcode] = state.id
+            fields = self._changed_fields(batch, i, state)
+            if not fields:
                 continue
 
-            rows.append(ExcelImportRow(
-                barcode=barcode,
-                seller_sku=get_cell_value("seller_sku"),
-                size=get_cell_value("size"),
-                brand=get_cell_value("brand"),
-                stock_quantity=get_int_value("stock_quantity"),
-                defect_quantity=get_int_value("defect_quantity"),
-                row_number=row_num,
-            ))
+            if {"seller_sku", "size", "brand", "is_deleted"} & set(fields):
+                product_rows.append(i)
+            if {"stock_quantity", "defect_quantity"} & set(fields):
+                balance_rows.append(i)
+            self._record_change(batch, i, "changed", fields)
+            updated += 1
 
-        workbook.close()
-        return rows, errors
+        if not self.dry_run:
+            if product_rows:
+                product_ids.update(await self._upsert_products(batch, product_rows))
+            if balance_rows:
+                await self._upsert_balances(batch, balance_rows, product_ids)
 
-    async def validate_rows(self, rows: list[ExcelImportRow]) -> list[ExcelImportError]:
-        errors: list[ExcelImportError] = []
-        
-        seen_barcodes: dict[str, int] = {}
-        for row in rows:
-            if row.barcode in seen_barcodes:
-                errors.append(ExcelImportError(
-                    row_number=row.row_number,
-                    field="barcode",
-                    message=f"Duplicate barcode, first occurrence at row {seen_barcodes[row.barcode]}"
-                ))
-            else:
-                seen_barcodes[row.barcode] = row.row_number
-
-            if row.stock_quantity < 0:
-                errors.append(ExcelImportError(
-                    row_number=row.row_number,
-                    field="stock_quantity",
-                    message="Stock quantity cannot be negative"
-                ))
-
-            if row.defect_quantity < 0:
-                errors.append(ExcelImportError(
-                    row_number=row.row_number,
-                    field="defect_quantity",
-                    message="Defect quantity cannot be negative"
-                ))
-
-        return errors
-
-    async def import_batch(self, rows: list[ExcelImportRow]) -> tuple[int, int]:
-        created = 0
-        updated = 0
-
-        for row in rows:
-            result = await self.db.execute(
-                select(Product).where(Product.barcode == row.barcode)
-            )
-            product = result.scalar_one_or_none()
-
-            if product:
-                product.seller_sku = row.seller_sku
-                product.size = row.size
-                product.brand = row.brand
-                product.is_deleted = False
-
-                product.stock.quantity = row.stock_quantity
-                product.defect_stock.quantity = row.defect_quantity
-                updated += 1
-            else:
-                gtin = self._generate_gtin(row.barcode)
-                product = Product(
-                    barcode=row.barcode,
-                    gtin=gtin,
-                    seller_sku=row.seller_sku,
-                    size=row.size,
-                    brand=row.brand,
-                )
-                self.db.add(product)
-                await self.db.flush()
+        return created, updated, len(batch) - created - updated
 
-                stock = Stock(
-                    product_id=product.id,
-                    quantity=row.stock_quantity,
-                )
-                self.db.add(stock)
+    @staticmethod
+    def _batch_stats(
+        batch_number: int, rows: int, created: int, updated: int, duration: float, partition: int = 0
+    ) -> ExcelImportBatchStats:
+        return ExcelImportBatchStats(
+            batch_number=batch_number,
+            partition=partition,
+            rows=rows,
+            created=created,
+            updated=updated,
+            unchanged=rows - created - updated,
+            duration_seconds=round(duration, 4),
+            rows_per_second=round(rows / duration, 1) if duration > 0 else 0.0,
+        )
 
-                defect_stock = DefectStock(
-                    product_id=product.id,
-                    quantity=row.defect_quantity,
-                )
-                self.db.add(defect_stock)
-                created += 1
+    async def _create_staging(self) -> None:
+        await self.db.execute(CREATE_STAGING_SQL)
+
+    async def _copy_to_staging(self, batch: ImportRowBatch) -> None:
+        size = len(batch)
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE,
+            records=list(zip(
+                batch.row_number,
+                [uuid4() for _ in range(size)],
+                batch.barcode,
+                [generate_gtin(barcode) for barcode in batch.barcode],
+                batch.seller_sku,
+                batch.size,
+                batch.brand,
+                batch.stock_quantity,
+                batch.defect_quantity,
+            )),
+            columns=STAGING_COLUMNS,
+        )
 
-        await self.db.commit()
-        return created, updated
-
-    async def import_from_file(self, file_content: bytes) -> ExcelImportResult:
-        rows, parse_errors = await self.parse_excel(file_content)
-        if parse_errors:
-            return ExcelImportResult(
-                total_rows=0,
-                created=0,
-                updated=0,
-                errors=parse_errors,
-                success=False,
-            )
+    async def _validate_staging(self) -> list[ExcelImportError]:
+        result = await self.db.execute(VALIDATE_STAGING_SQL)
+        return [
+            ExcelImportError(row_number=error.row_number, field=error.field, message=error.message)
+            for error in result
+        ]
+
+    async def _merge_staging(self) -> tuple[int, int]:
+        counts = (await self.db.execute(DIFF_STAGING_SQL)).one()
+        await self.db.execute(MERGE_PRODUCTS_SQL)
+        await self.db.execute(MERGE_BALANCES_SQL)
+        return counts.created, counts.updated
+
+    async def _report_progress(self) -> None:
+        if self.on_progress is not None:
+            await self.on_progress(self.progress)
+
+    async def _open_partitions(self, stack: AsyncExitStack, count: int) -> list["ExcelImportService"]:
+        # Partition 0 writes on the caller's session, which holds the import
+        # lock; every other partition gets its own pooled connection
+        partitions = [self]
+        for _ in range(count - 1):
+            session = await stack.enter_async_context(async_session())
+            partitions.append(ExcelImportService(session, partitions=1))
+        return partitions
+
+    async def _write_partition(
+        self,
+        index: int,
+        partition: "ExcelImportService",
+        queue: asyncio.Queue,
+        mode: ImportMode,
+        batches: list[ExcelImportBatchStats],
+    ) -> None:
+        # Drains one partition's queue until the None sentinel
+        while (batch := await queue.get()) is not None:
+            if mode == ImportMode.COPY:
+                await partition._copy_to_staging(batch)
+                continue
 
-        if not rows:
-            return ExcelImportResult(
-                total_rows=0,
-                created=0,
-                updated=0,
-                errors=[],
-                success=True,
-            )
+            batch_start = time.perf_counter()
+            created, updated, _ = await partition.import_batch(batch)
+            batches.append(self._batch_stats(
+                len(batches) + 1, len(batch), created, updated, time.perf_counter() - batch_start, index
+            ))
+            if not self.dry_run:
+                self.progress.rows_upserted += created + updated
 
-        validation_errors = await self.validate_rows(rows)
-        if validation_errors:
-            return ExcelImportResult(
-                total_rows=len(rows),
-                created=0,
-                updated=0,
-                errors=validation_errors,
-                success=False,
-            )
+    @staticmethod
+    async def _dispatch(queue: asyncio.Queue, writer: asyncio.Task, batch: Optional[ImportRowBatch]) -> None:
+        # Waits for queue space, but raises the writer's exception instead of
+        # blocking forever on the full queue of a failed writer
+        put = asyncio.ensure_future(queue.put(batch))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+        if writer.done():
+            writer.result()
 
+    @staticmethod
+    async def _gather_partitions(calls: Iterable[Awaitable[T]]) -> list[T]:
+        # Like gather, but raises only once every call has finished: a
+        # partition session must not be rolled back while its statement runs
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _commit_partitions(self, partitions: list["ExcelImportService"]) -> list[ExcelImportError]:
+        # All partitions have finished writing. The extra ones commit first and
+        # the caller's session last, so the import lock is held to the end.
+        # Commits on separate connections cannot be atomic: with a job_id,
+        # each partition adds itself to the job's committed_partitions in the
+        # transaction it commits, and the job resumes with the others (see
+        # ImportWorker). Without one, re-running the file applies the rest,
+        # since the import is differential.
+        order = [
+            index for index in [*range(1, len(partitions)), 0]
+            if index not in self.committed_partitions
+        ]
+        for position, index in enumerate(order):
+            session = partitions[index].db
+            try:
+                if self.job_id is not None:
+                    await session.execute(
+                        RECORD_PARTITION_SQL,
+                        {"partition": index, "partitions": len(partitions), "job_id": self.job_id},
+                    )
+                await session.commit()
+            except SQLAlchemyError as e:
+                for other in order[position:]:
+                    await partitions[other].db.rollback()
+                recovery = (
+                    "The job resumes with the remaining partitions" if self.job_id is not None
+                    else "Re-run the import to apply the remaining rows"
+                )
+                return [ExcelImportError(
+                    row_number=0,
+                    field="file",
+                    message=(
+                        f"Partition {index} failed to commit ({type(e).__name__}). "
+                        f"Committed partitions: {sorted(self.committed_partitions)}. {recovery}"
+                    ),
+                )]
+            self.committed_partitions.add(index)
+        return []
+
+    async def import_from_path(
+        self, path: Path, mode: ImportMode = ImportMode.BATCH
+    ) -> ExcelImportResult:
+        # Chunks are parsed and validated here, then split by GTIN hash
+        # into self.partitions partitions, each written on its own connection
+        # by a writer task fed through a bounded queue.
+        # batch: each partition batch is upserted as it arrives.
+        # copy: each partition batch is COPYed into that connection's staging
+        # table; once the file is consumed every partition validates and
+        # merges its staging table concurrently.
+        # Parsing, batch-mode validation and the split run in a child
+        # process (see stream_chunks).
+        # Any error stops further writes and rolls every partition back;
+        # otherwise the partitions commit one after another, and a failed
+        # commit leaves the earlier ones committed (see _commit_partitions).
+        # Partitions in committed_partitions are parsed but not written.
+        # With dry_run (batch mode, one partition) nothing is written or committed.
+        partition_count = self.partitions
+        if self.dry_run:
+            mode = ImportMode.BATCH
+            partition_count = 1
+        else:
+            await self.db.execute(ACQUIRE_IMPORT_LOCK_SQL, {"key": IMPORT_LOCK_KEY})
+
+        total_rows = 0
         total_created = 0
         total_updated = 0
+        total_unchanged = 0
+        errors: list[ExcelImportError] = []
+        batches: list[ExcelImportBatchStats] = []
+
+        async with AsyncExitStack() as stack:
+            partitions = await self._open_partitions(stack, partition_count)
+            if mode == ImportMode.COPY:
+                for partition in partitions:
+                    await partition._create_staging()
+            copy_start = time.perf_counter()
+
+            queues = [asyncio.Queue(maxsize=self.PARTITION_QUEUE_SIZE) for _ in partitions]
+            writers = [
+                asyncio.create_task(self._write_partition(index, partition, queue, mode, batches))
+                for index, (partition, queue) in enumerate(zip(partitions, queues))
+            ]
+            try:
+                # aclosing: leaving the loop early stops the parse process
+                # right away
+                chunks = self.stream_chunks(path, partition_count, mode == ImportMode.BATCH)
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        total_rows += chunk.rows
+                        errors.extend(chunk.errors)
+                        self.progress.rows_parsed = total_rows
+                        self.progress.error_count = len(errors)
+                        await self._report_progress()
+                        if len(errors) >= self.MAX_ERRORS:
+                            break
+                        if errors:
+                            continue
+
+                        for index, (queue, writer, part) in enumerate(zip(queues, writers, chunk.parts)):
+                            if part and index not in self.committed_partitions:
+                                await self._dispatch(queue, writer, part)
+
+                for queue, writer in zip(queues, writers):
+                    await self._dispatch(queue, writer, None)
+                await asyncio.gather(*writers)
+            except BaseException:
+                for writer in writers:
+                    writer.cancel()
+                await asyncio.gather(*writers, return_exceptions=True)
+                raise
+            await self._report_progress()
+
+            if mode == ImportMode.COPY and not errors and total_rows:
+                # Rows sharing a GTIN, and so a barcode, share a partition (see
+                # ImportRowBatch.partition), so per-partition checks find
+                # every duplicate
+                found = await self._gather_partitions(
+                    partition._validate_staging() for partition in partitions
+                )
+                errors = sorted(chain.from_iterable(found), key=lambda error: error.row_number)
+                if not errors:
+                    counts = await self._gather_partitions(
+                        partition._merge_staging() for partition in partitions
+                    )
+                    total_created = sum(created for created, _ in counts)
+                    total_updated = sum(updated for _, updated in counts)
+                    total_unchanged = total_rows - total_created - total_updated
+                    self.progress.rows_upserted = total_created + total_updated
+                    await self._report_progress()
+                    batches.append(self._batch_stats(
+                        1, total_rows, total_created, total_updated, time.perf_counter() - copy_start
+                    ))
+            elif mode == ImportMode.BATCH:
+                total_created = sum(stats.created for stats in batches)
+                total_updated = sum(stats.updated for stats in batches)
+                total_unchanged = sum(stats.unchanged for stats in batches)
+
+            if errors:
+                for partition in partitions:
+                    await partition.db.rollback()
+                return ExcelImportResult(
+                    total_rows=total_rows,
+                    created=0,
+                    updated=0,
+                    errors=errors[: self.MAX_ERRORS],
+                    success=False,
+                    mode=mode,
+                    partitions=partition_count,
+                )
 
-        for i in range(0, len(rows), self.BATCH_SIZE):
-            batch = rows[i : i + self.BATCH_SIZE]
-            created, updated = await self.import_batch(batch)
-            total_created += created
-            total_updated += updated
+            if self.dry_run:
+                await self.db.rollback()
+            else:
+                errors = await self._commit_partitions(partitions)
+                if errors:
+                    return ExcelImportResult(
+                        total_rows=total_rows,
+                        created=0,
+                        updated=0,
+                        errors=errors,
+                        success=False,
+                        mode=mode,
+                        partitions=partition_count,
+                    )
 
         return ExcelImportResult(
-            total_rows=len(rows),
+            total_rows=total_rows,
             created=total_created,
             updated=total_updated,
+            unchanged=total_unchanged,
             errors=[],
             success=True,
+            mode=mode,
+            partitions=partition_count,
+            batches=batches,
         )
@@ -0,0 +1,310 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session
+from app.models.import_job import ImportJob, ImportJobStatus
+from app.schemas.import_schema import ImportMode
+from app.services.excel_import import ExcelImportService, ImportProgress
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobService:
+    """Service for queueing Excel imports and reading their progress."""
+    
+    @staticmethod
+    async def submit(
+        db: AsyncSession,
+        file_path: Path,
+        filename: str,
+        mode: ImportMode,
+        user_id: str
+    ) -> ImportJob:
+        """Create a pending job and wake up the worker of this process."""
+        job = ImportJob(
+            status=ImportJobStatus.PENDING.value,
+            mode=mode.value,
+            filename=filename,
+            file_path=str(file_path),
+            user_id=user_id,
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        
+        import_worker.notify()
+        return job
+    
+    @staticmethod
+    async def get(db: AsyncSession, job_id: UUID) -> Optional[ImportJob]:
+        result = await db.execute(select(ImportJob).where(ImportJob.id == job_id))
+        return result.scalar_one_or_none()
+    
+    @staticmethod
+    async def fail_stale_jobs(db: AsyncSession) -> None:
+        """
+        Fail running jobs whose worker stopped sending heartbeats and delete
+        their uploaded files.
+        
+        A running job's updated_at is refreshed at least every
+        IMPORT_JOB_HEARTBEAT_SECONDS (see ImportWorker._execute), including
+        while it waits for the import lock behind another import. Jobs that
+        died between partition commits are queued again instead, while they
+        have attempts left, and resume with the uncommitted partitions.
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.IMPORT_JOB_STALE_SECONDS
+        )
+        stale = (
+            ImportJob.status == ImportJobStatus.RUNNING.value,
+            ImportJob.updated_at < stale_before,
+        )
+        requeued = await db.execute(
+            update(ImportJob)
+            .where(
+                *stale,
+                func.cardinality(ImportJob.committed_partitions) > 0,
+                ImportJob.attempts < settings.IMPORT_JOB_MAX_ATTEMPTS,
+            )
+            .values(
+                status=ImportJobStatus.PENDING.value,
+                message="Import worker stopped between partition commits, resuming",
+            )
+            .returning(ImportJob.id)
+        )
+        result = await db.execute(
+            update(ImportJob)
+            .where(*stale)
+            .values(
+                status=ImportJobStatus.FAILED.value,
+                message="Import worker stopped before the job finished",
+                finished_at=func.now(),
+            )
+            .returning(ImportJob.id, ImportJob.file_path)
+        )
+        requeued_ids = requeued.scalars().all()
+        failed = result.all()
+        await db.commit()
+        
+        for job_id in requeued_ids:
+            logger.warning("Import job %s requeued: worker stopped between partition commits", job_id)
+        if requeued_ids:
+            import_worker.notify()
+        for job in failed:
+            logger.warning("Import job %s failed: worker stopped sending heartbeats", job.id)
+            Path(job.file_path).unlink(missing_ok=True)
+    
+    @staticmethod
+    def eta_seconds(job: ImportJob) -> Optional[float]:
+        """Estimate remaining time from parse rate so far and the sheet row estimate."""
+        if (
+            job.status != ImportJobStatus.RUNNING.value
+            or job.started_at is None
+            or not job.rows_total
+            or not job.rows_parsed
+        ):
+            return None
+        
+        elapsed = (datetime.now(timezone.utc) - job.started_at).total_seconds()
+        remaining = max(job.rows_total - job.rows_parsed, 0)
+        return round(elapsed / job.rows_parsed * remaining, 1)
+
+
+class ImportWorker:
+    """
+    In-process worker executing queued import jobs one at a time.
+    
+    Every API worker process runs one. Jobs are claimed with
+    FOR UPDATE SKIP LOCKED so each job runs exactly once, and the import
+    itself takes a transaction-level advisory lock (see ExcelImportService),
+    so at most one import writes to products/balances at any moment.
+    
+    A job may run on any host, so uploads must be spooled to an
+    IMPORT_UPLOAD_DIR shared by all of them.
+    """
+    
+    def __init__(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def notify(self) -> None:
+        self._wakeup.set()
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                job = await self._claim_next()
+            except Exception:
+                logger.exception("Failed to claim import job")
+                job = None
+            
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        timeout=settings.IMPORT_JOB_POLL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._execute(job)
+    
+    async def _claim_next(self) -> Optional[ImportJob]:
+        next_job = (
+            select(ImportJob.id)
+            .where(ImportJob.status == ImportJobStatus.PENDING.value)
+            .order_by(ImportJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session() as db:
+            result = await db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == next_job)
+                .values(
+                    status=ImportJobStatus.RUNNING.value,
+                    started_at=func.now(),
+                    attempts=ImportJob.attempts + 1,
+                )
+                .returning(ImportJob)
+            )
+            job = result.scalar_one_or_none()
+            await db.commit()
+            return job
+    
+    async def _update_job(self, job_id: UUID, **values) -> None:
+        async with async_session() as db:
+            await db.execute(
+                update(ImportJob).where(ImportJob.id == job_id).values(**values)
+            )
+            await db.commit()
+    
+    async def _heartbeat(self, job_id: UUID) -> None:
+        # Keeps the job from looking stale while it makes no progress, e.g.
+        # while waiting for the import lock or merging a staging table
+        while True:
+            await asyncio.sleep(settings.IMPORT_JOB_HEARTBEAT_SECONDS)
+            try:
+                await self._update_job(job_id, updated_at=func.now())
+            except Exception:
+                logger.exception("Failed to record heartbeat of import job %s", job_id)
+    
+    async def _execute(self, job: ImportJob) -> None:
+        async def on_progress(progress: ImportProgress) -> None:
+            # Own short transaction, so progress is visible while the import
+            # transaction is still open
+            await self._update_job(
+                job.id,
+                rows_total=progress.rows_total,
+                rows_parsed=progress.rows_parsed,
+                rows_upserted=progress.rows_upserted,
+                error_count=progress.error_count,
+            )
+        
+        path = Path(job.file_path)
+        if not path.exists():
+            logger.error("Upload of import job %s not found at %s", job.id, path)
+            await self._update_job(
+                job.id,
+                status=ImportJobStatus.FAILED.value,
+                message=(
+                    f"Uploaded file not found on this host: {path}. "
+                    "IMPORT_UPLOAD_DIR must be shared by all API hosts"
+                ),
+                finished_at=func.now(),
+            )
+            return
+        
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        service = None
+        try:
+            async with async_session() as db:
+                service = ExcelImportService(
+                    db,
+                    on_progress=on_progress,
+                    partitions=job.partitions,
+                    job_id=job.id,
+                    committed_partitions=job.committed_partitions,
+                )
+                result = await service.import_from_path(path, ImportMode(job.mode))
+            values = {
+                "status": (
+                    ImportJobStatus.COMPLETED.value if result.success
+                    else ImportJobStatus.FAILED.value
+                ),
+                "rows_parsed": result.total_rows,
+                "rows_upserted": result.created + result.updated,
+                "error_count": len(result.errors),
+                "result": result.model_dump(mode="json"),
+            }
+            if result.success and job.committed_partitions:
+                values["message"] = (
+                    f"Resumed: partitions {sorted(job.committed_partitions)} were committed "
+                    "by an earlier attempt and are not counted in the result"
+                )
+        except Exception as e:
+            logger.exception("Import job %s failed", job.id)
+            values = {
+                "status": ImportJobStatus.FAILED.value,
+                "message": str(e),
+            }
+        finally:
+            heartbeat.cancel()
+        
+        # Some partitions committed and others did not: run the job again,
+        # skipping the committed ones
+        if (
+            values["status"] == ImportJobStatus.FAILED.value
+            and service is not None
+            and service.committed_partitions - set(job.committed_partitions)
+            and job.attempts < settings.IMPORT_JOB_MAX_ATTEMPTS
+        ):
+            logger.warning(
+                "Import job %s committed partitions %s only, requeued",
+                job.id, sorted(service.committed_partitions),
+            )
+            values = {
+                "status": ImportJobStatus.PENDING.value,
+                "message": (
+                    f"Partitions {sorted(service.committed_partitions)} committed, "
+                    "resuming with the others"
+                ),
+            }
+            self.notify()
+        else:
+            path.unlink(missing_ok=True)
+        
+        try:
+            if values["status"] != ImportJobStatus.PENDING.value:
+                values["finished_at"] = func.now()
+            await self._update_job(job.id, **values)
+        except Exception:
+            logger.exception("Failed to record result of import job %s", job.id)
+
+
+# One worker per API process, started in the application lifespan
+import_worker = ImportWorker()
@@ -0,0 +1,700 @@
+import csv
+import html
+import multiprocessing
+import posixpath
+import queue
+import re
+import traceback
+import zipfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, Optional
+from xml.etree.ElementTree import iterparse
+
+from openpyxl import load_workbook
+
+from app.schemas.import_schema import ExcelImportError
+from app.services.import_rows import ImportRowBatch
+
+Chunk = tuple[ImportRowBatch, list[ExcelImportError]]
+
+
+class ImportReader(ABC):
+    """
+    Reads one import file format into ImportRowBatch chunks.
+
+    Readers are blocking generators; ExcelImportService runs them in a
+    worker thread. Every format uses the same header names
+    (ExcelImportService.COLUMN_MAPPING) and reports file-level problems
+    as a single error chunk.
+    """
+
+    # File suffixes handled by this reader
+    extensions: tuple[str, ...] = ()
+
+    def __init__(self, column_mapping: dict[str, str], batch_size: int):
+        self.column_mapping = column_mapping
+        self.batch_size = batch_size
+        # Estimated number of data rows, if the format exposes it cheaply
+        self.rows_total: Optional[int] = None
+
+    @abstractmethod
+    def iter_chunks(self, path: Path) -> Iterator[Chunk]:
+        """Yield (batch, errors) chunks of at most batch_size rows."""
+
+    @staticmethod
+    def _error(row_number: int, field: str, message: str) -> Chunk:
+        return ImportRowBatch(), [ExcelImportError(row_number=row_number, field=field, message=message)]
+
+    def _resolve_header(self, header: Iterable[Any]) -> dict[str, int]:
+        """Map field names to column positions for the recognised headers."""
+        column_indices: dict[str, int] = {}
+        for idx, value in enumerate(header):
+            header_value = str(value).strip() if value else ""
+            if header_value in self.column_mapping:
+                column_indices[self.column_mapping[header_value]] = idx
+        return column_indices
+
+    def _chunk_rows(
+        self,
+        rows: Iterable[tuple[int, tuple[Any, ...]]],
+        column_indices: dict[str, int],
+    ) -> Iterator[Chunk]:
+        """Collect mapped cells of (row_number, values) tuples into column chunks."""
+        fields = list(column_indices)
+        indices = [column_indices[name] for name in fields]
+        row_numbers: list[int] = []
+        columns: dict[str, list] = {name: [] for name in fields}
+
+        for row_num, row in rows:
+            if all(value is None for value in row):
+                continue
+
+            row_numbers.append(row_num)
+            width = len(row)
+            for name, idx in zip(fields, indices):
+                columns[name].append(row[idx] if idx < width else None)
+
+            if len(row_numbers) >= self.batch_size:
+                yield ImportRowBatch.from_columns(row_numbers, columns)
+                row_numbers = []
+                columns = {name: [] for name in fields}
+
+        if row_numbers:
+            yield ImportRowBatch.from_columns(row_numbers, columns)
+
+
+class XlsxReader(ImportReader):
+    """openpyxl reader for the 'Сводная' sheet of an Excel workbook."""
+
+    extensions = (".xlsx", ".xls")
+    SHEET_NAME = "Сводная"
+
+    def iter_chunks(self, path: Path) -> Iterator[Chunk]:
+        try:
+            workbook = load_workbook(path, read_only=True, data_only=True)
+        except Exception as e:
+            yield self._error(0, "file", f"Failed to open Excel file: {str(e)}")
+            return
+
+        try:
+            sheet = None
+            for ws in workbook.worksheets:
+                if ws.title == self.SHEET_NAME:
+                    sheet = ws
+                    break
+
+            if sheet is None:
+                yield self._error(0, "sheet", f"Sheet '{self.SHEET_NAME}' not found")
+                return
+
+            if sheet.max_row:
+                self.rows_total = max(sheet.max_row - 1, 0)
+
+            header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            if header_row is None:
+                yield self._error(1, "header", "Empty file - no header row")
+                return
+
+            column_indices = self._resolve_header(header_row)
+            if "barcode" not in column_indices:
+                yield self._error(1, "barcode", "Required column 'Баркод' not found")
+                return
+
+            yield from self._chunk_rows(
+                enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2),
+                column_indices,
+            )
+        finally:
+            workbook.close()
+
+
+# SpreadsheetML (transitional) namespaces
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Worksheet markup is scanned as bytes; writers (Excel, LibreOffice, openpyxl)
+# emit unprefixed tags with the cell reference as the first attribute
+_DIMENSION_RE = re.compile(rb'<dimension ref="(?:[A-Z]+\d+:)?[A-Z]+(\d+)"')
+_ROW_RE = re.compile(rb'<row\b([^>]*?)(?:/>|>(.*?)</row>)', re.S)
+_ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+_ANY_CELL_RE = re.compile(rb'<c\b([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+_CELL_REF_RE = re.compile(rb'\br="([A-Z]+)')
+_CELL_TYPE_RE = re.compile(rb'\bt="(\w+)"')
+_VALUE_RE = re.compile(rb'<v>(.*?)</v>', re.S)
+_TEXT_RE = re.compile(rb'<t(?:\s[^>]*)?>(.*?)</t>', re.S)
+_PHONETIC_RE = re.compile(rb'<rPh\b.*?</rPh>', re.S)
+_SHARED_STRING_RE = re.compile(rb'<si>(?:<t(?:\s[^>]*)?>([^<]*)</t>|(.*?))</si>', re.S)
+# Cells of the mapped columns only, as (letters, row, type, other attributes,
+# plain <v> value, any other inner markup); r, s, t is the usual attribute order
+_TARGET_CELL_TEMPLATE = (
+    rb'<c r="(%s)(\d+)"(?: s="\d+")?(?: t="(\w+)")?([^>/]*)'
+    rb'(?:/>|><v>([^<]*)</v></c>|>(.*?)</c>)'
+)
+
+
+class XlsxStructureError(Exception):
+    """The workbook does not have the layout FastXlsxReader understands."""
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _column_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _decode(raw: bytes) -> str:
+    text = raw.decode("utf-8")
+    return html.unescape(text) if "&" in text else text
+
+
+def _rich_text(markup: bytes) -> str:
+    """Concatenate the text runs of a string item, skipping phonetic hints."""
+    if b"<rPh" in markup:
+        markup = _PHONETIC_RE.sub(b"", markup)
+    return _decode(b"".join(_TEXT_RE.findall(markup)))
+
+
+class FastXlsxReader(ImportReader):
+    """
+    Streaming reader for the 'Сводная' sheet that bypasses openpyxl.
+
+    Opens the xlsx zip directly, loads sharedStrings.xml once and scans the
+    target sheet in READ_BLOCK_SIZE blocks with a regex built from the
+    mapped column letters, so cells of other columns are never turned into
+    Python objects and memory stays flat apart from the shared strings.
+    Values follow openpyxl's conversions for strings, numbers and booleans;
+    number formats (dates) are not applied. Rows with no value in any mapped
+    column are skipped as empty.
+
+    Falls back to XlsxReader (openpyxl) when the workbook layout is not
+    understood, e.g. strict OOXML namespaces or prefixed sheet markup. The
+    layout is checked before the first chunk; later errors are raised.
+    """
+
+    extensions = (".xlsx",)
+    SHEET_NAME = XlsxReader.SHEET_NAME
+    READ_BLOCK_SIZE = 1 << 20
+
+    def iter_chunks(self, path: Path) -> Iterator[Chunk]:
+        try:
+            archive = zipfile.ZipFile(path)
+        except (OSError, zipfile.BadZipFile) as e:
+            yield self._error(0, "file", f"Failed to open Excel file: {str(e)}")
+            return
+
+        with archive:
+            # The layout is checked before the first chunk; once rows have
+            # been yielded, falling back would import them a second time
+            try:
+                sheet_path, strings_path = self._locate_parts(archive)
+                if sheet_path is None:
+                    yield self._error(0, "sheet", f"Sheet '{self.SHEET_NAME}' not found")
+                    return
+                shared_strings = self._load_shared_strings(archive, strings_path)
+                sheet = archive.open(sheet_path)
+            except (XlsxStructureError, KeyError, SyntaxError):
+                yield from self._fallback(path)
+                return
+
+            with sheet:
+                try:
+                    header_row, buffer = self._read_header(sheet, shared_strings)
+                except XlsxStructureError:
+                    yield from self._fallback(path)
+                    return
+
+                if header_row is None:
+                    yield self._error(1, "header", "Empty file - no header row")
+                    return
+                column_indices = self._resolve_header(header_row)
+                if "barcode" not in column_indices:
+                    yield self._error(1, "barcode", "Required column 'Баркод' not found")
+                    return
+
+                yield from self._iter_rows(sheet, buffer, column_indices, shared_strings)
+
+    def _fallback(self, path: Path) -> Iterator[Chunk]:
+        reader = XlsxReader(self.column_mapping, self.batch_size)
+        for chunk in reader.iter_chunks(path):
+            self.rows_total = reader.rows_total
+            yield chunk
+
+    def _locate_parts(self, archive: zipfile.ZipFile) -> tuple[Optional[str], Optional[str]]:
+        """Return zip paths of the target sheet and of the shared strings part."""
+        rels: dict[str, str] = {}
+        strings_path = None
+        with archive.open("xl/_rels/workbook.xml.rels") as file:
+            for _, element in iterparse(file):
+                if element.tag != f"{_PKG_REL_NS}Relationship":
+                    continue
+                target = element.get("Target", "")
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                rels[element.get("Id")] = target
+                if element.get("Type", "").endswith("/sharedStrings"):
+                    strings_path = target
+
+        sheet_path = None
+        found_sheets = False
+        with archive.open("xl/workbook.xml") as file:
+            for _, element in iterparse(file):
+                if element.tag != f"{_MAIN_NS}sheet":
+                    continue
+                found_sheets = True
+                if element.get("name") == self.SHEET_NAME:
+                    sheet_path = rels[element.get(f"{_REL_NS}id")]
+                    break
+
+        if not found_sheets:
+            raise XlsxStructureError("No sheets in the transitional namespace")
+        return sheet_path, strings_path
+
+    @staticmethod
+    def _load_shared_strings(archive: zipfile.ZipFile, strings_path: Optional[str]) -> list[str]:
+        if strings_path is None or strings_path not in archive.namelist():
+            return []
+
+        markup = archive.read(strings_path)
+        strings = [
+            _decode(plain) if plain else _rich_text(rich)
+            for plain, rich in _SHARED_STRING_RE.findall(markup)
+        ]
+        if not strings and b":si>" in markup:
+            raise XlsxStructureError("Shared strings markup is namespace-prefixed")
+        return strings
+
+    def _read_header(
+        self,
+        sheet: IO[bytes],
+        shared_strings: list[str],
+    ) -> tuple[Optional[list[Any]], bytes]:
+        """
+        Read the sheet up to the end of its first row and check its layout.
+
+        Returns:
+            (header row values, or None for an empty sheet; the unread rest
+            of the buffer)
+
+        Raises:
+            XlsxStructureError: The sheet markup is not understood
+        """
+        buffer = b""
+        while b"</row>" not in buffer and b"</sheetData>" not in buffer and b"<sheetData/>" not in buffer:
+            block = sheet.read(self.READ_BLOCK_SIZE)
+            if not block:
+                break
+            buffer += block
+
+        data_start = buffer.find(b"<sheetData")
+        if data_start < 0:
+            raise XlsxStructureError("Worksheet markup is namespace-prefixed")
+
+        dimension = _DIMENSION_RE.search(buffer, 0, data_start)
+        if dimension:
+            self.rows_total = max(int(dimension.group(1)) - 1, 0)
+
+        first_row = _ROW_RE.search(buffer, data_start)
+        if first_row is None:
+            return None, b""
+
+        header: dict[int, Any] = {}
+        row_number = _ROW_NUMBER_RE.search(first_row.group(1))
+        if row_number is None or row_number.group(1) == b"1":
+            for attrs, inner in _ANY_CELL_RE.findall(first_row.group(2) or b""):
+                ref = _CELL_REF_RE.search(attrs)
+                if ref is None:
+                    raise XlsxStructureError("Cell without a reference")
+                type_match = _CELL_TYPE_RE.search(attrs)
+                cell_type = type_match.group(1) if type_match else b""
+                header[_column_index(ref.group(1).decode())] = self._cell_value(cell_type, inner, shared_strings)
+
+        buffer = buffer[first_row.end():]
+        if buffer.count(b"<c ") + buffer.count(b"<c>") != buffer.count(b'<c r="'):
+            raise XlsxStructureError("Cells without a leading reference attribute")
+
+        return [header.get(i) for i in range(max(header, default=-1) + 1)], buffer
+
+    def _iter_rows(
+        self,
+        sheet: IO[bytes],
+        buffer: bytes,
+        column_indices: dict[str, int],
+        shared_strings: list[str],
+    ) -> Iterator[Chunk]:
+        """Scan the data rows following the header for the mapped columns."""
+        fields_by_letters = {
+            _column_letters(index).encode(): field for field, index in column_indices.items()
+        }
+        cell_re = re.compile(
+            _TARGET_CELL_TEMPLATE % b"|".join(sorted(fields_by_letters, key=len, reverse=True)),
+            re.S,
+        )
+        fields = list(column_indices)
+        row_numbers: list[int] = []
+        columns: dict[str, list] = {name: [] for name in fields}
+        current_row = None
+        row_values: dict[str, Any] = {}
+
+        while True:
+            block = sheet.read(self.READ_BLOCK_SIZE)
+            buffer += block
+            # Scan complete rows only; the tail waits for the next block
+            end = buffer.rfind(b"</row>") + len(b"</row>") if block else len(buffer)
+            if end < len(b"</row>"):
+                end = 0
+
+            for letters, row, cell_type, attrs, value, inner in cell_re.findall(buffer, 0, end):
+                if row != current_row:
+                    if row_values:
+                        row_numbers.append(int(current_row))
+                        for name in fields:
+                            columns[name].append(row_values.get(name))
+                        row_values = {}
+                        if len(row_numbers) >= self.batch_size:
+                            yield ImportRowBatch.from_columns(row_numbers, columns)
+                            row_numbers = []
+                            columns = {name: [] for name in fields}
+                    current_row = row
+                if b"t=" in attrs:
+                    # Type attribute out of the usual order
+                    type_match = _CELL_TYPE_RE.search(attrs)
+                    if type_match:
+                        cell_type = type_match.group(1)
+
+                # Inlined fast path for plain numbers and shared strings
+                if value and (not cell_type or cell_type == b"n"):
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        value = float(value)
+                elif value and cell_type == b"s":
+                    value = shared_strings[int(value)]
+                elif value:
+                    value = self._cell_value(cell_type, b"<v>" + value + b"</v>", shared_strings)
+                elif inner:
+                    value = self._cell_value(cell_type, inner, shared_strings)
+                else:
+                    continue
+                if value is not None:
+                    row_values[fields_by_letters[letters]] = value
+
+            buffer = buffer[end:]
+            if not block:
+                break
+
+        if row_values:
+            row_numbers.append(int(current_row))
+            for name in fields:
+                columns[name].append(row_values.get(name))
+        if row_numbers:
+            yield ImportRowBatch.from_columns(row_numbers, columns)
+
+    @staticmethod
+    def _cell_value(cell_type: bytes, inner: Optional[bytes], shared_strings: list[str]) -> Any:
+        """Convert a cell's inner markup the way openpyxl does for data_only reads."""
+        if not inner:
+            return None
+        if cell_type == b"inlineStr":
+            return _rich_text(inner)
+
+        match = _VALUE_RE.search(inner)
+        if match is None:
+            return None
+        value = match.group(1)
+
+        if not cell_type or cell_type == b"n":
+            if not value:
+                return None
+            # Same rule as openpyxl: integers stay int, anything else is float
+            if b"." in value or b"E" in value or b"e" in value:
+                return float(value)
+            return int(value)
+        if cell_type == b"s":
+            return shared_strings[int(value)]
+        if cell_type == b"b":
+            return value == b"1"
+        return _decode(value)
+
+
+class CsvReader(ImportReader):
+    """Reader for CSV exports with the 'Сводная' column headers."""
+
+    extensions = (".csv",)
+    DELIMITERS = ",;\t"
+
+    def iter_chunks(self, path: Path) -> Iterator[Chunk]:
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                yield from self._iter_file(file)
+        except OSError as e:
+            yield self._error(0, "file", f"Failed to open CSV file: {str(e)}")
+
+    def _iter_file(self, file: IO[str]) -> Iterator[Chunk]:
+        try:
+            sample = file.read(64 * 1024)
+            file.seek(0)
+        except UnicodeDecodeError as e:
+            yield self._error(0, "file", f"Failed to open CSV file: {str(e)}")
+            return
+
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=self.DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.reader(file, dialect)
+        header_row = next(reader, None)
+        if header_row is None:
+            yield self._error(1, "header", "Empty file - no header row")
+            return
+
+        column_indices = self._resolve_header(header_row)
+        if "barcode" not in column_indices:
+            yield self._error(1, "barcode", "Required column 'Баркод' not found")
+            return
+
+        # Empty CSV fields mean "no value", like empty Excel cells
+        rows = (
+            (reader.line_num, tuple(value if value != "" else None for value in row))
+            for row in reader
+        )
+        try:
+            yield from self._chunk_rows(rows, column_indices)
+        except (csv.Error, UnicodeDecodeError) as e:
+            yield self._error(reader.line_num, "file", f"Failed to read CSV file: {str(e)}")
+
+
+class ParquetReader(ImportReader):
+    """
+    pyarrow reader for Parquet exports with the 'Сводная' column names.
+
+    Only the mapped columns are read. Row numbers count data rows from 2,
+    as if the file had a header row, so errors read the same as for CSV/Excel.
+    """
+
+    extensions = (".parquet",)
+
+    def iter_chunks(self, path: Path) -> Iterator[Chunk]:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            yield self._error(0, "file", "Parquet import requires the pyarrow package")
+            return
+
+        try:
+            parquet_file = pq.ParquetFile(path)
+        except Exception as e:
+            yield self._error(0, "file", f"Failed to open Parquet file: {str(e)}")
+            return
+
+        try:
+            self.rows_total = parquet_file.metadata.num_rows
+            names = parquet_file.schema_arrow.names
+            column_indices = self._resolve_header(names)
+            if "barcode" not in column_indices:
+                yield self._error(1, "barcode", "Required column 'Баркод' not found")
+                return
+
+            selected = {field: names[idx] for field, idx in column_indices.items()}
+            row_num = 1
+            for record_batch in parquet_file.iter_batches(
+                batch_size=self.batch_size, columns=list(selected.values())
+            ):
+                size = record_batch.num_rows
+                row_numbers = list(range(row_num + 1, row_num + 1 + size))
+                row_num += size
+                columns = {
+                    field: record_batch.column(name).to_pylist()
+                    for field, name in selected.items()
+                }
+                non_empty = [
+                    i for i in range(size)
+                    if any(column[i] is not None for column in columns.values())
+                ]
+                if len(non_empty) < size:
+                    row_numbers = [row_numbers[i] for i in non_empty]
+                    columns = {field: [column[i] for i in non_empty] for field, column in columns.items()}
+                if row_numbers:
+                    yield ImportRowBatch.from_columns(row_numbers, columns)
+        finally:
+            parquet_file.close()
+
+
+# First match wins: .xlsx goes to FastXlsxReader, .xls to openpyxl
+READERS: tuple[type[ImportReader], ...] = (FastXlsxReader, XlsxReader, CsvReader, ParquetReader)
+
+SUPPORTED_EXTENSIONS: tuple[str, ...] = tuple(dict.fromkeys(
+    extension for reader in READERS for extension in reader.extensions
+))
+
+
+def get_reader(path: Path, column_mapping: dict[str, str], batch_size: int) -> ImportReader:
+    """Pick the reader for a file by its suffix."""
+    suffix = path.suffix.lower()
+    for reader in READERS:
+        if suffix in reader.extensions:
+            return reader(column_mapping, batch_size)
+    raise ValueError(f"Unsupported import file format: {suffix}")
+
+
+# Parse processes are forked from a server process that has this module
+# loaded already, so starting one per import costs about a fork
+_PARSE_CONTEXT = multiprocessing.get_context("forkserver")
+_PARSE_CONTEXT.set_forkserver_preload([__name__])
+
+
+class ParseFailure(Exception):
+    """The parse process failed; carries its formatted traceback."""
+
+
+@dataclass
+class ParsedChunk:
+    """One reader chunk as sent back by the parse process."""
+    rows: int
+    # Rows split by ImportRowBatch.partition; empty once the file has errors
+    parts: list[ImportRowBatch]
+    errors: list[ExcelImportError]
+    rows_total: Optional[int]
+
+
+def _parse_file(
+    path: Path,
+    column_mapping: dict[str, str],
+    batch_size: int,
+    partitions: int,
+    validate: bool,
+    chunks,
+    stop,
+) -> None:
+    """Body of the parse process, see ParseProcess."""
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        # Nobody reads any more; exit without flushing the queue
+        chunks.cancel_join_thread()
+        return False
+
+    try:
+        reader = get_reader(path, column_mapping, batch_size)
+        # First occurrences across chunks of the file
+        seen_barcodes: dict[str, int] = {}
+        seen_gtins: dict[str, tuple[str, int]] = {}
+        failed = False
+        for batch, errors in reader.iter_chunks(path):
+            if validate and batch:
+                errors = errors + batch.validate(seen_barcodes, seen_gtins)
+            failed = failed or bool(errors)
+            parts = batch.partition(partitions) if batch and not failed else []
+            if not put(ParsedChunk(len(batch), parts, errors, reader.rows_total)):
+                return
+        put(None)
+    except Exception:
+        put(ParseFailure(traceback.format_exc()))
+
+
+class ParseProcess:
+    """
+    Reads, validates and partitions an import file in a child process.
+
+    Parsing and the per-row checks are CPU-bound; in a child process they
+    neither hold the event loop nor compete with the writers for the GIL.
+    Chunks come back through a queue of QUEUE_SIZE entries, so the child
+    parses at most that far ahead of the caller. next_chunk() and stop()
+    block and are meant for a worker thread.
+    """
+
+    QUEUE_SIZE = 2
+    # Seconds between liveness checks of the child while waiting for a chunk
+    POLL_SECONDS = 0.5
+    # Seconds stop() waits for the child before terminating it
+    STOP_TIMEOUT_SECONDS = 5.0
+
+    def __init__(
+        self,
+        path: Path,
+        column_mapping: dict[str, str],
+        batch_size: int,
+        partitions: int,
+        validate: bool,
+    ):
+        self._chunks = _PARSE_CONTEXT.Queue(self.QUEUE_SIZE)
+        self._stop = _PARSE_CONTEXT.Event()
+        self._process = _PARSE_CONTEXT.Process(
+            target=_parse_file,
+            args=(path, column_mapping, batch_size, partitions, validate, self._chunks, self._stop),
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._process.start()
+
+    def next_chunk(self) -> Optional[ParsedChunk]:
+        """
+        Wait for the next chunk; None once the file is consumed.
+
+        Raises:
+            ParseFailure: The child raised, or exited without finishing
+        """
+        while True:
+            try:
+                item = self._chunks.get(timeout=self.POLL_SECONDS)
+            except queue.Empty:
+                if self._process.is_alive():
+                    continue
+                try:
+                    item = self._chunks.get_nowait()
+                except queue.Empty:
+                    raise ParseFailure(
+                        f"Parse process exited with code {self._process.exitcode}"
+                    ) from None
+            if isinstance(item, ParseFailure):
+                raise item
+            return item
+
+    def stop(self) -> None:
+        """Stop the child, finished or not, and wait for it to exit."""
+        self._stop.set()
+        self._process.join(self.STOP_TIMEOUT_SECONDS)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._chunks.close()
@@ -0,0 +1,188 @@
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+from zlib import crc32
+
+from app.schemas.import_schema import ExcelImportError
+
+STRING_FIELDS = ("barcode", "seller_sku", "size", "brand")
+QUANTITY_FIELDS = ("stock_quantity", "defect_quantity")
+
+
+def generate_gtin(barcode: str) -> str:
+    """
+    GTIN stored for an imported barcode.
+
+    Not injective: a 13-digit code and its zero-padded 14-digit form, and
+    any barcodes sharing their first 11 characters, get the same GTIN.
+    """
+    if len(barcode) in (13, 14) and barcode.isdigit():
+        return barcode.zfill(14)
+    padded = barcode[:11].ljust(11, "0")
+    return f"IMP{padded}"
+
+
+def _strip_column(values: Sequence[Any]) -> list[Optional[str]]:
+    return [str(value).strip() if value is not None else None for value in values]
+
+
+def _coerce_int_column(values: Sequence[Any]) -> tuple[list[int], list[int]]:
+    """Coerce a column to int, returning (values, indices that are not numbers)."""
+    # Fast path: numeric cells from xlsx/parquet need no parsing
+    if all(type(value) is int for value in values):
+        return list(values), []
+
+    coerced: list[int] = []
+    invalid: list[int] = []
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            coerced.append(0)
+            continue
+        try:
+            coerced.append(int(float(value)))
+        except (ValueError, TypeError, OverflowError):
+            coerced.append(0)
+            invalid.append(i)
+    return coerced, invalid
+
+
+@dataclass
+class ImportRowBatch:
+    """
+    Column-oriented chunk of import rows: one list per field, all the same length.
+
+    Checks run over whole columns and ExcelImportError objects are created
+    only for rows that fail them.
+    """
+    row_number: list[int] = field(default_factory=list)
+    barcode: list[str] = field(default_factory=list)
+    seller_sku: list[Optional[str]] = field(default_factory=list)
+    size: list[Optional[str]] = field(default_factory=list)
+    brand: list[Optional[str]] = field(default_factory=list)
+    stock_quantity: list[int] = field(default_factory=list)
+    defect_quantity: list[int] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.row_number)
+
+    @classmethod
+    def from_columns(
+        cls,
+        row_numbers: list[int],
+        columns: dict[str, list[Any]],
+    ) -> tuple["ImportRowBatch", list[ExcelImportError]]:
+        """
+        Build a batch from raw cell values keyed by field name.
+
+        Strips strings, coerces quantities and drops rows without a barcode
+        or with non-numeric quantities, reporting them as errors. Fields
+        missing from columns are treated as empty.
+        """
+        size = len(row_numbers)
+        empty = [None] * size
+
+        strings = {name: _strip_column(columns.get(name, empty)) for name in STRING_FIELDS}
+        errors: list[ExcelImportError] = []
+        rejected: set[int] = set()
+
+        for i, barcode in enumerate(strings["barcode"]):
+            if not barcode:
+                rejected.add(i)
+                errors.append(ExcelImportError(
+                    row_number=row_numbers[i],
+                    field="barcode",
+                    message="Barcode is required"
+                ))
+
+        quantities: dict[str, list[int]] = {}
+        for name in QUANTITY_FIELDS:
+            quantities[name], invalid = _coerce_int_column(columns.get(name, empty))
+            for i in invalid:
+                rejected.add(i)
+                errors.append(ExcelImportError(
+                    row_number=row_numbers[i],
+                    field=name,
+                    message=f"Value '{columns[name][i]}' is not a number"
+                ))
+
+        batch = cls(row_number=list(row_numbers), **strings, **quantities)
+        if rejected:
+            batch = batch.take([i for i in range(size) if i not in rejected])
+            errors.sort(key=lambda error: error.row_number)
+        return batch, errors
+
+    def take(self, indices: Sequence[int]) -> "ImportRowBatch":
+        """Return a new batch with only the given row positions."""
+        return ImportRowBatch(
+            row_number=[self.row_number[i] for i in indices],
+            barcode=[self.barcode[i] for i in indices],
+            seller_sku=[self.seller_sku[i] for i in indices],
+            size=[self.size[i] for i in indices],
+            brand=[self.brand[i] for i in indices],
+            stock_quantity=[self.stock_quantity[i] for i in indices],
+            defect_quantity=[self.defect_quantity[i] for i in indices],
+        )
+
+    def partition(self, count: int) -> list["ImportRowBatch"]:
+        """
+        Split rows into count batches by hash of the generated GTIN.
+
+        Rows sharing a GTIN, and so rows sharing a barcode, always land in
+        the same partition: partitions never write the same product or the
+        same unique GTIN, so they cannot block on each other's uncommitted
+        rows, and duplicates stay within one partition.
+        """
+        if count <= 1:
+            return [self]
+        indices: list[list[int]] = [[] for _ in range(count)]
+        for i, barcode in enumerate(self.barcode):
+            indices[crc32(generate_gtin(barcode).encode()) % count].append(i)
+        return [self.take(part) for part in indices]
+
+    def validate(
+        self,
+        seen_barcodes: dict[str, int],
+        seen_gtins: dict[str, tuple[str, int]],
+    ) -> list[ExcelImportError]:
+        """
+        Check duplicate barcodes, colliding GTINs and negative quantities.
+
+        seen_barcodes maps barcode to the row of its first occurrence and
+        seen_gtins maps generated GTIN to the (barcode, row) it was first
+        generated for; both are carried across the batches of one file.
+        """
+        errors: list[ExcelImportError] = []
+
+        for i, barcode in enumerate(self.barcode):
+            row_number = self.row_number[i]
+            first_row = seen_barcodes.setdefault(barcode, row_number)
+            if first_row != row_number:
+                errors.append(ExcelImportError(
+                    row_number=row_number,
+                    field="barcode",
+                    message=f"Duplicate barcode, first occurrence at row {first_row}"
+                ))
+
+            gtin = generate_gtin(barcode)
+            first_barcode, first_row = seen_gtins.setdefault(gtin, (barcode, row_number))
+            if first_barcode != barcode:
+                errors.append(ExcelImportError(
+                    row_number=row_number,
+                    field="barcode",
+                    message=f"GTIN {gtin} is also generated for barcode {first_barcode} at row {first_row}"
+                ))
+
+        for name, message in (
+            ("stock_quantity", "Stock quantity cannot be negative"),
+            ("defect_quantity", "Defect quantity cannot be negative"),
+        ):
+            column = getattr(self, name)
+            if min(column, default=0) >= 0:
+                continue
+            errors.extend(
+                ExcelImportError(row_number=self.row_number[i], field=name, message=message)
+                for i, quantity in enumerate(column)
+                if quantity < 0
+            )
+
+        errors.sort(key=lambda error: error.row_number)
+        return errors
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session
+from app.services.counts import CountService
+from app.services.import_jobs import ImportJobService
+from app.services.partitions import MovementPartitionService
+from app.services.replica import ReplicaService
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    In-process task running a database job at startup and then every
+    interval seconds.
+    
+    Every API worker process runs one of each; the jobs are safe to run
+    concurrently from several processes.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[AsyncSession], Awaitable[None]],
+        interval: Callable[[], float]
+    ) -> None:
+        self.name = name
+        self._job = job
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with async_session() as db:
+                    await self._job(db)
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            await asyncio.sleep(self._interval())
+
+
+# Keeps future stock_movements partitions in place, so a long-running
+# process never reaches a month without a partition
+partition_maintainer = PeriodicTask(
+    "stock_movements partitions",
+    MovementPartitionService.ensure_partitions,
+    lambda: settings.MOVEMENT_PARTITIONS_CHECK_SECONDS,
+)
+
+# Folds counter deltas so that list totals keep reading a few rows
+counter_compactor = PeriodicTask(
+    "counter compaction",
+    CountService.compact,
+    lambda: settings.COUNTER_COMPACT_SECONDS,
+)
+
+# Tracks replica lag and replay position for routing reads
+replica_monitor = PeriodicTask(
+    "replica monitor",
+    ReplicaService.check,
+    lambda: settings.REPLICA_CHECK_SECONDS,
+)
+
+# Fails import jobs of workers that died mid-import, in any process
+stale_import_reaper = PeriodicTask(
+    "stale import jobs",
+    ImportJobService.fail_stale_jobs,
+    lambda: settings.IMPORT_JOB_STALE_CHECK_SECONDS,
+)
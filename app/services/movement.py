@@ -1,182 +1,426 @@
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID, uuid4
+
 from fastapi import HTTPException, status
-from sqlalchemy import select, text
+from sqlalchemy import (
+    BigInteger, Integer, Select, String, Text, bindparam, exists, false, func, insert,
+    literal, select, true, update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
 from app.models.stock_movement import StockMovement, OperationType
 from app.models.product import Product
-from app.schemas.movement import MovementCreate
+from app.models.product_balance import ProductBalance
+from app.schemas.movement import MovementCreate, MovementResponse
+from app.services.reference_cache import reference_cache
 
 
-class MovementService:
-    """Service for executing stock movement operations atomically."""
+@dataclass(frozen=True)
+class OperationEffect:
+    """Balance changes of one operation type, applied as sign * quantity."""
+    stock: int
+    defect: int
+    shortage: Optional[str] = None  # error when the decreased balance is short
     
-    @staticmethod
-    async def _validate_product_exists(db: AsyncSession, product_id: str) -> Product:
-        """Validate that product exists and is not deleted."""
-        result = await db.execute(
-            select(Product).where(
-                Product.id == product_id,
-                Product.is_deleted == False
-            )
+    @property
+    def decreases(self) -> Optional[InstrumentedAttribute[int]]:
+        """ProductBalance column the operation takes from, if any."""
+        if self.stock < 0:
+            return ProductBalance.good_qty
+        if self.defect < 0:
+            return ProductBalance.defect_qty
+        return None
+
+
+OPERATION_EFFECTS: dict[str, OperationEffect] = {
+    # Приёмка годного товара
+    OperationType.RECEIPT.value: OperationEffect(stock=1, defect=0),
+    # Приёмка брака
+    OperationType.RECEIPT_DEFECT.value: OperationEffect(stock=0, defect=1),
+    # Отгрузка в РЦ
+    OperationType.SHIPMENT_RC.value: OperationEffect(
+        stock=-1, defect=0, shortage="Недостаточно товара для отгрузки"
+    ),
+    # Возврат годного с ПВЗ
+    OperationType.RETURN_PICKUP.value: OperationEffect(stock=1, defect=0),
+    # Возврат брака
+    OperationType.RETURN_DEFECT.value: OperationEffect(stock=0, defect=1),
+    # Самовыкуп
+    OperationType.SELF_PURCHASE.value: OperationEffect(stock=1, defect=0),
+    # Списание в брак
+    OperationType.WRITE_OFF.value: OperationEffect(
+        stock=-1, defect=1, shortage="Недостаточно товара для списания в брак"
+    ),
+    # Восстановление из брака
+    OperationType.RESTORATION.value: OperationEffect(
+        stock=1, defect=-1, shortage="Недостаточно брака для восстановления"
+    ),
+    # Утилизация брака
+    OperationType.UTILIZATION.value: OperationEffect(
+        stock=0, defect=-1, shortage="Недостаточно брака для утилизации"
+    ),
+}
+
+
+def _movement_statement(operation: str, effect: OperationEffect) -> Select:
+    """
+    One statement executing a movement of the given operation type.
+    
+    WITH product      -- the product, unless missing or deleted
+         balance      -- balance update, guarded by quantity >= :amount
+                         when the operation decreases a balance; an upsert
+                         creating a missing balance row otherwise
+         movement     -- journal row; only after a guarded update succeeded
+    SELECT product fields, movement fields FROM product LEFT JOIN movement
+    
+    No row means the product was not found; a row without a movement means
+    the decreased balance was short, and then nothing was changed.
+    """
+    # Parameter names must not match balance columns: extra parameters
+    # named like a column would be added to the UPDATE's SET clause
+    quantity = bindparam("amount", type_=Integer)
+    product = (
+        select(Product.id, Product.barcode, Product.gtin)
+        .where(Product.id == bindparam("target_product", type_=PG_UUID(as_uuid=True)))
+        .where(Product.is_deleted == false())
+        .cte("product")
+    )
+    
+    changes = {"version": ProductBalance.version + 1}
+    for column, sign in (
+        (ProductBalance.good_qty, effect.stock),
+        (ProductBalance.defect_qty, effect.defect),
+    ):
+        if sign > 0:
+            changes[column.key] = column + quantity
+        elif sign < 0:
+            changes[column.key] = column - quantity
+    
+    decreased = effect.decreases
+    if decreased is not None:
+        # A missing balance row is a zero balance: the guard fails
+        balance_change = (
+            update(ProductBalance)
+            .where(ProductBalance.product_id == select(product.c.id).scalar_subquery())
+            .where(decreased >= quantity)
+            .values(changes)
         )
-        product = result.scalar_one_or_none()
-        
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product not found"
+    else:
+        # A missing balance row would leave the journal row unapplied
+        initial = {
+            column.key: quantity if sign > 0 else literal(0)
+            for column, sign in (
+                (ProductBalance.good_qty, effect.stock),
+                (ProductBalance.defect_qty, effect.defect),
             )
-        
-        return product
+        }
+        initial["version"] = literal(1, BigInteger)
+        balance_change = (
+            pg_insert(ProductBalance.__table__)
+            .from_select(["product_id", *initial], select(product.c.id, *initial.values()))
+            .on_conflict_do_update(
+                index_elements=[ProductBalance.product_id],
+                set_={**changes, "updated_at": func.now()},
+            )
+        )
+    balance = balance_change.returning(ProductBalance.product_id).cte("balance")
+    
+    source = select(
+        bindparam("movement_id", type_=PG_UUID(as_uuid=True)),
+        literal(operation, String),
+        product.c.id,
+        quantity,
+        bindparam("source_id", type_=PG_UUID(as_uuid=True)),
+        bindparam("distribution_center_id", type_=PG_UUID(as_uuid=True)),
+        bindparam("user_id", type_=PG_UUID(as_uuid=True)),
+        bindparam("notes", type_=Text),
+    ).select_from(product)
+    if decreased is not None:
+        source = source.where(exists(select(balance.c.product_id)))
+    movement = (
+        insert(StockMovement.__table__)
+        .from_select(
+            ["id", "operation_type", "product_id", "quantity", "source_id",
+             "distribution_center_id", "user_id", "notes"],
+            source,
+        )
+        .returning(StockMovement.id, StockMovement.created_at)
+        .cte("movement")
+    )
+    
+    # Data-modifying CTEs run even when the query does not read them
+    return (
+        select(product.c.barcode, product.c.gtin, movement.c.id, movement.c.created_at)
+        .select_from(product.outerjoin(movement, true()))
+        .add_cte(balance)
+    )
+
+
+# Built once; each operation type's statement compiles once per process
+_MOVEMENT_STATEMENTS: dict[str, Select] = {
+    operation: _movement_statement(operation, effect)
+    for operation, effect in OPERATION_EFFECTS.items()
+}
+
+
+class MovementService:
+    """Service for executing stock movement operations atomically."""
     
     @staticmethod
     async def execute_movement(
         db: AsyncSession,
         data: MovementCreate,
         user_id: str
-    ) -> StockMovement:
+    ) -> MovementResponse:
         """
-        Execute a stock movement operation atomically.
+        Execute a stock movement operation atomically in one round trip.
         
-        1. Validates product exists and is not deleted
-        2. Validates conditional fields (already done in schema, but double-check)
-        3. Executes stock updates based on operation type
-        4. Creates audit log entry
-        5. All in a single transaction (atomic)
+        A single statement (see _movement_statement) checks the product,
+        applies the operation's OPERATION_EFFECTS entry to the balances and
+        inserts the journal row. The caller commits, then fills in source
+        and DC names with resolve_names().
         
         Raises:
             HTTPException 400: Validation error (insufficient stock)
             HTTPException 404: Product not found
         """
-        # Validate product exists
-        await MovementService._validate_product_exists(db, str(data.product_id))
-        
-        operation = data.operation_type
-        qty = data.quantity
-        pid = str(data.product_id)
-        
-        # Execute operation-specific stock updates
-        if operation == OperationType.RECEIPT.value:
-            # RECEIPT: Increase Stock
-            await db.execute(
-                text("UPDATE stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
+        statement = _MOVEMENT_STATEMENTS.get(data.operation_type)
+        if statement is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown operation type: {data.operation_type}"
             )
         
-        elif operation == OperationType.RECEIPT_DEFECT.value:
-            # RECEIPT_DEFECT: Increase DefectStock
-            await db.execute(
-                text("UPDATE defect_stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
-            )
+        # Core execution: plain rows, nothing for the ORM to add
+        connection = await db.connection()
+        result = await connection.execute(
+            statement,
+            {
+                "movement_id": uuid4(),
+                "target_product": data.product_id,
+                "amount": data.quantity,
+                "source_id": data.source_id,
+                "distribution_center_id": data.distribution_center_id,
+                "user_id": user_id,
+                "notes": data.notes,
+            }
+        )
+        row = result.one_or_none()
         
-        elif operation == OperationType.SHIPMENT_RC.value:
-            # SHIPMENT_RC: Decrease Stock with validation
-            result = await db.execute(
-                text("UPDATE stocks SET quantity = quantity - :qty "
-                     "WHERE product_id = :pid AND quantity >= :qty "
-                     "RETURNING quantity"),
-                {"qty": qty, "pid": pid}
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
             )
-            if not result.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Недостаточно товара для отгрузки"
-                )
-        
-        elif operation == OperationType.RETURN_PICKUP.value:
-            # RETURN_PICKUP: Increase Stock (source_id validated in schema)
-            await db.execute(
-                text("UPDATE stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
+        if row.id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=OPERATION_EFFECTS[data.operation_type].shortage
             )
         
-        elif operation == OperationType.RETURN_DEFECT.value:
-            # RETURN_DEFECT: Increase DefectStock (source_id validated in schema)
-            await db.execute(
-                text("UPDATE defect_stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
-            )
+        return MovementResponse(
+            id=row.id,
+            operation_type=data.operation_type,
+            product_id=data.product_id,
+            quantity=data.quantity,
+            source_id=data.source_id,
+            distribution_center_id=data.distribution_center_id,
+            user_id=user_id,
+            notes=data.notes,
+            created_at=row.created_at,
+            product_barcode=row.barcode,
+            product_gtin=row.gtin,
+        )
+
+    @staticmethod
+    async def _lock_balances(
+        db: AsyncSession,
+        product_ids: list[UUID]
+    ) -> dict[UUID, list[int]]:
+        """
+        Lock balance rows in product_id order and return [good, defect] quantities.
         
-        elif operation == OperationType.SELF_PURCHASE.value:
-            # SELF_PURCHASE: Increase Stock (source_id validated in schema)
-            await db.execute(
-                text("UPDATE stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
-            )
+        Products without a balance row get an empty one first, so that every
+        line recorded in the journal is also applied to a balance.
+        """
+        locked = (
+            select(ProductBalance.product_id, ProductBalance.good_qty, ProductBalance.defect_qty)
+            .order_by(ProductBalance.product_id)
+            .with_for_update()
+        )
+        result = await db.execute(locked.where(ProductBalance.product_id.in_(product_ids)))
+        balances = {row.product_id: [row.good_qty, row.defect_qty] for row in result}
         
-        elif operation == OperationType.WRITE_OFF.value:
-            # WRITE_OFF: Decrease Stock, Increase DefectStock atomically
-            result = await db.execute(
-                text("UPDATE stocks SET quantity = quantity - :qty "
-                     "WHERE product_id = :pid AND quantity >= :qty "
-                     "RETURNING quantity"),
-                {"qty": qty, "pid": pid}
-            )
-            if not result.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Недостаточно товара для списания в брак"
-                )
-            
+        missing = [pid for pid in product_ids if pid not in balances]
+        if missing:
             await db.execute(
-                text("UPDATE defect_stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
+                pg_insert(ProductBalance.__table__).on_conflict_do_nothing(),
+                [{"product_id": pid} for pid in missing]
             )
+            result = await db.execute(locked.where(ProductBalance.product_id.in_(missing)))
+            balances.update({row.product_id: [row.good_qty, row.defect_qty] for row in result})
+        return balances
+    
+    @staticmethod
+    async def _write_balances(
+        db: AsyncSession,
+        balances: dict[UUID, list[int]]
+    ) -> None:
+        """
+        Write new balances for many products with a single UPDATE ... FROM unnest(...).
         
-        elif operation == OperationType.RESTORATION.value:
-            # RESTORATION: Decrease DefectStock, Increase Stock atomically
-            result = await db.execute(
-                text("UPDATE defect_stocks SET quantity = quantity - :qty "
-                     "WHERE product_id = :pid AND quantity >= :qty "
-                     "RETURNING quantity"),
-                {"qty": qty, "pid": pid}
+        The rows travel as three array parameters, so the statement text does
+        not depend on the number of products and its compilation is cached.
+        """
+        if not balances:
+            return
+        
+        product_ids = sorted(balances)
+        new_balances = func.unnest(
+            literal(product_ids, ARRAY(PG_UUID(as_uuid=True))),
+            literal([balances[pid][0] for pid in product_ids], ARRAY(Integer)),
+            literal([balances[pid][1] for pid in product_ids], ARRAY(Integer)),
+        ).table_valued("product_id", "good_qty", "defect_qty").render_derived(name="new_balances")
+        
+        await db.execute(
+            update(ProductBalance)
+            .where(ProductBalance.product_id == new_balances.c.product_id)
+            .values(
+                good_qty=new_balances.c.good_qty,
+                defect_qty=new_balances.c.defect_qty,
+                version=ProductBalance.version + 1,
             )
-            if not result.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Недостаточно брака для восстановления"
-                )
-            
-            await db.execute(
-                text("UPDATE stocks SET quantity = quantity + :qty WHERE product_id = :pid"),
-                {"qty": qty, "pid": pid}
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    async def execute_bulk(
+        db: AsyncSession,
+        items: list[MovementCreate],
+        user_id: str
+    ) -> list[MovementResponse]:
+        """
+        Execute many stock movement operations in one transaction.
+        
+        1. Validates all products exist with one SELECT
+        2. Locks the products' balance rows in product_id order, so
+           concurrent bulk requests cannot deadlock each other
+        3. Applies lines in request order against the locked balances
+        4. Writes changed balances set-based and inserts all journal rows
+           with multi-row INSERTs
+        
+        All-or-nothing: if any line fails, nothing is written and every
+        failing line is reported as {"line": <1-based index>, "detail": <message>}.
+        Source and DC names are left to resolve_names() after commit.
+        
+        Raises:
+            HTTPException 400: One or more lines have insufficient stock
+            HTTPException 404: One or more products not found
+        """
+        product_ids = sorted({item.product_id for item in items})
+        
+        result = await db.execute(
+            select(Product.id, Product.barcode, Product.gtin).where(
+                Product.id.in_(product_ids),
+                Product.is_deleted == False
             )
+        )
+        products = {row.id: row for row in result}
         
-        elif operation == OperationType.UTILIZATION.value:
-            # UTILIZATION: Decrease DefectStock with validation
-            result = await db.execute(
-                text("UPDATE defect_stocks SET quantity = quantity - :qty "
-                     "WHERE product_id = :pid AND quantity >= :qty "
-                     "RETURNING quantity"),
-                {"qty": qty, "pid": pid}
+        missing = [
+            {"line": line, "detail": "Product not found"}
+            for line, item in enumerate(items, start=1)
+            if item.product_id not in products
+        ]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=missing
             )
-            if not result.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Недостаточно брака для утилизации"
-                )
         
-        else:
+        balances = await MovementService._lock_balances(db, product_ids)
+        
+        # Apply lines in order against the locked balances
+        errors = []
+        touched: set[UUID] = set()
+        for line, item in enumerate(items, start=1):
+            effect = OPERATION_EFFECTS[item.operation_type]
+            pid = item.product_id
+            good, defect = balances[pid]
+            new_good = good + effect.stock * item.quantity
+            new_defect = defect + effect.defect * item.quantity
+            
+            if new_good < 0 or new_defect < 0:
+                errors.append({"line": line, "detail": effect.shortage})
+                continue
+            
+            balances[pid] = [new_good, new_defect]
+            touched.add(pid)
+        
+        if errors:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unknown operation type: {operation}"
+                detail=errors
             )
         
-        # Create audit log entry
-        movement = StockMovement(
-            operation_type=operation,
-            product_id=data.product_id,
-            quantity=data.quantity,
-            source_id=data.source_id,
-            distribution_center_id=data.distribution_center_id,
-            user_id=user_id,
-            notes=data.notes
+        await MovementService._write_balances(
+            db, {pid: balances[pid] for pid in touched}
         )
-        db.add(movement)
         
-        # Flush to get the movement ID (commit happens in API layer)
-        await db.flush()
-        await db.refresh(movement)
+        # Create all audit log entries; executemany parameters let
+        # insertmanyvalues send multi-row INSERTs from one cached compilation
+        rows = [
+            {
+                "id": uuid4(),
+                "operation_type": item.operation_type,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "source_id": item.source_id,
+                "distribution_center_id": item.distribution_center_id,
+                "user_id": user_id,
+                "notes": item.notes,
+            }
+            for item in items
+        ]
+        result = await db.execute(
+            insert(StockMovement.__table__)
+            .returning(StockMovement.id, StockMovement.created_at),
+            rows
+        )
+        created_at = {row.id: row.created_at for row in result}
         
-        return movement
+        return [
+            MovementResponse(
+                id=row["id"],
+                operation_type=row["operation_type"],
+                product_id=row["product_id"],
+                quantity=row["quantity"],
+                source_id=row["source_id"],
+                distribution_center_id=row["distribution_center_id"],
+                user_id=row["user_id"],
+                notes=row["notes"],
+                created_at=created_at[row["id"]],
+                product_barcode=products[row["product_id"]].barcode,
+                product_gtin=products[row["product_id"]].gtin,
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    async def resolve_names(
+        db: AsyncSession,
+        movements: list[MovementResponse]
+    ) -> None:
+        """
+        Fill in source and DC names of movements from the reference cache.
+        
+        Call it after commit: refreshing an expired cache runs queries, which
+        must not extend the transaction holding the balance row locks.
+        """
+        refs = await reference_cache.get(db)
+        for movement in movements:
+            movement.source_name = refs.source_name(movement.source_id)
+            movement.dc_name = refs.dc_name(movement.distribution_center_id)
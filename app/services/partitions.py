@@ -0,0 +1,23 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+class MovementPartitionService:
+    """Monthly range partitions of stock_movements (see migration 008)."""
+
+    @staticmethod
+    async def ensure_partitions(db: AsyncSession) -> None:
+        """
+        Create partitions for the current month and the months ahead.
+
+        Existing partitions are kept. Rows that went to the default
+        partition for a newly created month are moved into it.
+        """
+        await db.execute(
+            text("SELECT create_stock_movements_partitions(:months_ahead)"),
+            {"months_ahead": settings.MOVEMENT_PARTITIONS_AHEAD}
+        )
+        await db.commit()
+
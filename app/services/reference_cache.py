@@ -0,0 +1,113 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import async_session, replica_engine
+from app.models.distribution_center import DistributionCenter
+from app.models.source import Source
+from app.schemas.distribution_center import DCResponse
+from app.schemas.source import SourceResponse
+
+
+@dataclass
+class ReferenceData:
+    """Immutable snapshot of sources and distribution centers."""
+    sources: list[SourceResponse]
+    distribution_centers: list[DCResponse]
+    source_by_id: dict[UUID, SourceResponse] = field(init=False)
+    dc_by_id: dict[UUID, DCResponse] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.source_by_id = {source.id: source for source in self.sources}
+        self.dc_by_id = {dc.id: dc for dc in self.distribution_centers}
+
+    def source_name(self, source_id: Optional[UUID]) -> Optional[str]:
+        source = self.source_by_id.get(source_id)
+        return source.name if source else None
+
+    def dc_name(self, dc_id: Optional[UUID]) -> Optional[str]:
+        dc = self.dc_by_id.get(dc_id)
+        return dc.name if dc else None
+
+
+class ReferenceCache:
+    """
+    Per-process cache of sources and distribution centers.
+
+    Writes in this process call invalidate() after commit, which bumps the
+    version; a load that started before the bump is not stored. Writes in
+    other worker processes are picked up once the snapshot is older than
+    REFERENCE_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self) -> None:
+        self._data: Optional[ReferenceData] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._data = None
+
+    async def get(self, db: AsyncSession) -> ReferenceData:
+        """Return the current snapshot, loading it if missing or expired."""
+        data = self._fresh()
+        if data is not None:
+            return data
+
+        async with self._lock:
+            # Another request may have loaded it while this one waited
+            data = self._fresh()
+            if data is not None:
+                return data
+
+            version = self._version
+            if replica_engine is not None and db.bind is replica_engine:
+                # A lagging replica would pin a stale snapshot for the
+                # whole TTL, past the invalidation of a write just made
+                async with async_session() as primary:
+                    data = await self._load(primary)
+            else:
+                data = await self._load(db)
+            if version == self._version:
+                self._data = data
+                self._loaded_at = time.monotonic()
+            return data
+
+    def _fresh(self) -> Optional[ReferenceData]:
+        if self._data is None:
+            return None
+        if time.monotonic() - self._loaded_at > settings.REFERENCE_CACHE_TTL_SECONDS:
+            return None
+        return self._data
+
+    @staticmethod
+    async def _load(db: AsyncSession) -> ReferenceData:
+        # Columns only: loading the entities would also load their movements
+        sources = await db.execute(
+            select(
+                Source.id, Source.name, Source.description,
+                Source.created_at, Source.updated_at
+            ).order_by(Source.name)
+        )
+        dcs = await db.execute(
+            select(
+                DistributionCenter.id, DistributionCenter.code,
+                DistributionCenter.name, DistributionCenter.marketplace,
+                DistributionCenter.created_at, DistributionCenter.updated_at
+            ).order_by(DistributionCenter.marketplace, DistributionCenter.code)
+        )
+        return ReferenceData(
+            sources=[SourceResponse.model_validate(row) for row in sources],
+            distribution_centers=[DCResponse.model_validate(row) for row in dcs],
+        )
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,116 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database import CURRENT_WAL_LSN_SQL, replica_session
+
+logger = logging.getLogger(__name__)
+
+# Cookie carrying the primary WAL position after a client's last write
+WRITE_LSN_COOKIE = "wms_write_lsn"
+
+
+@dataclass
+class ReplicaStatus:
+    """Last observed state of the read replica."""
+    available: bool = False
+    replay_lsn: int = 0
+    lag_seconds: Optional[float] = None
+    checked_at: float = 0.0
+
+
+replica_status = ReplicaStatus()
+
+
+def parse_lsn(value: Optional[str]) -> Optional[int]:
+    """pg_lsn text ('16/B374D848') to a comparable integer; None if invalid."""
+    if not value:
+        return None
+    high, sep, low = value.partition("/")
+    if not sep:
+        return None
+    try:
+        return (int(high, 16) << 32) + int(low, 16)
+    except ValueError:
+        return None
+
+
+def replica_usable(write_lsn: Optional[int]) -> bool:
+    """
+    Whether a read may go to the replica.
+
+    Args:
+        write_lsn: Primary WAL position after the client's last write, if
+            any; the replica must have replayed it (read-your-writes)
+    """
+    status = replica_status
+    if replica_session is None or not status.available:
+        return False
+    # A monitor that stopped reporting says nothing about the replica
+    if time.monotonic() - status.checked_at > 3 * settings.REPLICA_CHECK_SECONDS:
+        return False
+    return write_lsn is None or status.replay_lsn >= write_lsn
+
+
+def mark_replica_down() -> None:
+    """Stop routing reads to the replica until the monitor sees it again."""
+    if replica_status.available:
+        logger.warning("Read replica unreachable, reading from the primary", exc_info=True)
+    replica_status.available = False
+    replica_status.lag_seconds = None
+
+
+class ReplicaService:
+    """Replica health checks and write watermarks."""
+
+    @staticmethod
+    async def current_lsn(db: AsyncSession) -> str:
+        """Current WAL position of the primary."""
+        result = await db.execute(CURRENT_WAL_LSN_SQL)
+        return result.scalar_one()
+
+    @staticmethod
+    async def check(db: AsyncSession) -> None:
+        """
+        Refresh replica_status from the primary (db) and the replica.
+
+        The replica counts as lagging by 0 once it has replayed the primary
+        position read just before; otherwise by the age of the last
+        transaction it replayed. It is available while that lag is within
+        REPLICA_MAX_LAG_SECONDS.
+        """
+        primary_lsn = parse_lsn(await ReplicaService.current_lsn(db))
+        await db.commit()
+
+        try:
+            async with replica_session() as replica:
+                result = await replica.execute(text(
+                    "SELECT pg_last_wal_replay_lsn()::text, "
+                    "extract(epoch FROM now() - pg_last_xact_replay_timestamp())"
+                ))
+                replay, replay_age = result.one()
+        except Exception:
+            mark_replica_down()
+            replica_status.checked_at = time.monotonic()
+            return
+
+        replay_lsn = parse_lsn(replay)
+        if replay_lsn is None:
+            lag = None  # not in recovery: not a replica
+        elif replay_lsn >= primary_lsn:
+            lag = 0.0
+        else:
+            lag = float(replay_age) if replay_age is not None else None
+
+        available = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if available != replica_status.available:
+            logger.warning("Read replica %s (lag %s s)", "in use" if available else "skipped", lag)
+        replica_status.available = available
+        replica_status.replay_lsn = replay_lsn or 0
+        replica_status.lag_seconds = lag
+        replica_status.checked_at = time.monotonic()
@@ -16,6 +16,9 @@ export async function getMovements(filters: MovementFilters = {}): Promise<Movem
   if (filters.date_from) params.append('date_from', filters.date_from)
   if (filters.date_to) params.append('date_to', filters.date_to)
   if (filters.barcode) params.append('barcode', filters.barcode)
+  if (filters.source_id) params.append('source_id', filters.source_id)
+  if (filters.distribution_center_id) params.append('distribution_center_id', filters.distribution_center_id)
+  if (filters.user_id) params.append('user_id', filters.user_id)
   
   const response = await api.get<MovementsResponse>('/stock/movements', { params })
   return response.data
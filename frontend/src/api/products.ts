@@ -12,13 +12,13 @@ interface ProductsResponse {
 export async function getProducts(
   page = 1,
   pageSize = 20,
-  barcode?: string
+  query?: string
 ): Promise<ProductsResponse> {
   const params = new URLSearchParams()
   params.append('page', String(page))
   params.append('page_size', String(pageSize))
-  if (barcode) {
-    params.append('barcode', barcode)
+  if (query) {
+    params.append('q', query)
   }
   const response = await api.get<ProductsResponse>(`/products/?${params.toString()}`)
   return response.data
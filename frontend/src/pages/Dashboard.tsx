@@ -160,7 +160,7 @@ export default function Dashboard() {
       <Card title="Товары">
         <Space style={{ marginBottom: 16 }}>
           <Input.Search
-            placeholder="Поиск по штрихкоду"
+            placeholder="Поиск по штрихкоду, артикулу или бренду"
             allowClear
             enterButton="Поиск"
             size="large"
@@ -54,4 +54,7 @@ export interface MovementFilters {
   date_from?: string
   date_to?: string
   barcode?: string
+  source_id?: string
+  distribution_center_id?: string
+  user_id?: string
 }
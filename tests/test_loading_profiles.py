@@ -0,0 +1,118 @@
+"""
+Loading profiles of app/models/loading.py against a real database.
+
+Relationships are lazy="raise": a query that forgets to load one must
+fail on first access instead of issuing a query, and above all must
+never load a product's whole movements collection.
+"""
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.models.loading import COLUMNS_ONLY, MOVEMENT_WITH_PRODUCT, PRODUCT_WITH_BALANCES
+from app.models.product import Product
+from app.models.product_balance import ProductBalance
+from app.models.stock_movement import OperationType, StockMovement
+from app.models.user import User
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    """Session inside a transaction that is rolled back after the test."""
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        connection = await engine.connect()
+    except OSError as e:
+        await engine.dispose()
+        pytest.skip(f"Database not reachable: {e}")
+    transaction = await connection.begin()
+    session = AsyncSession(bind=connection, expire_on_commit=False, autoflush=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+async def movement(db: AsyncSession) -> StockMovement:
+    """A product with a balance row and one journal entry, not in the identity map."""
+    user_id = (await db.execute(select(User.id).limit(1))).scalar_one_or_none()
+    if user_id is None:
+        pytest.skip("No user to record a movement for")
+
+    barcode = "LP" + uuid4().hex[:12]
+    product = Product(barcode=barcode, gtin=barcode[:14])
+    db.add(product)
+    await db.flush()
+    db.add(ProductBalance(product_id=product.id, good_qty=5, defect_qty=1))
+    entry = StockMovement(
+        operation_type=OperationType.RECEIPT.value,
+        quantity=5,
+        product_id=product.id,
+        user_id=user_id,
+    )
+    db.add(entry)
+    await db.flush()
+    # Later queries must load everything themselves
+    db.expunge_all()
+    return entry
+
+
+def _loaded(entity, attribute: str) -> bool:
+    return attribute not in inspect(entity).unloaded
+
+
+@pytest.mark.anyio
+async def test_columns_only_raises_on_every_relationship(db: AsyncSession, movement: StockMovement):
+    product = (await db.execute(
+        select(Product).where(Product.id == movement.product_id).options(*COLUMNS_ONLY)
+    )).scalar_one()
+    with pytest.raises(InvalidRequestError):
+        product.movements
+    with pytest.raises(InvalidRequestError):
+        product.balance
+
+    entry = (await db.execute(
+        select(StockMovement).where(StockMovement.id == movement.id).options(*COLUMNS_ONLY)
+    )).scalar_one()
+    with pytest.raises(InvalidRequestError):
+        entry.product
+
+
+@pytest.mark.anyio
+async def test_product_with_balances_loads_balance_only(db: AsyncSession, movement: StockMovement):
+    product = (await db.execute(
+        select(Product).where(Product.id == movement.product_id).options(*PRODUCT_WITH_BALANCES)
+    )).scalar_one()
+
+    assert _loaded(product, "balance")
+    assert (product.balance.good_qty, product.balance.defect_qty) == (5, 1)
+    with pytest.raises(InvalidRequestError):
+        product.movements
+
+
+@pytest.mark.anyio
+async def test_movement_with_product_loads_product_only(db: AsyncSession, movement: StockMovement):
+    entry = (await db.execute(
+        select(StockMovement).where(StockMovement.id == movement.id).options(*MOVEMENT_WITH_PRODUCT)
+    )).scalar_one()
+
+    assert _loaded(entry, "product")
+    assert entry.product.barcode.startswith("LP")
+    with pytest.raises(InvalidRequestError):
+        entry.product.movements
+    with pytest.raises(InvalidRequestError):
+        entry.product.balance